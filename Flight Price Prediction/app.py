@@ -1,4 +1,8 @@
-from flask import Flask, request, render_template
+import os
+import sys
+import time
+import traceback
+from flask import Flask, request, render_template, jsonify
 import numpy as np
 import pickle
 import matplotlib
@@ -9,9 +13,59 @@ import base64
 
 app = Flask(__name__)
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Directory holding rf_model.pkl and scaler.pkl (overridable for benchmarks and deployments)
+MODEL_DIR = os.environ.get("FLIGHT_MODEL_DIR", BASE_DIR)
+# Optional directory with a candidate rf_model.pkl and scaler.pkl, evaluated in shadow mode
+SHADOW_MODEL_DIR = os.environ.get("FLIGHT_SHADOW_MODEL_DIR")
+
+# Shared helpers live at the repository root (copied next to app.py in the Docker image)
+sys.path.append(os.path.dirname(BASE_DIR))
+from voyage_common.admission import DEGRADED_HEADER, install_admission
+from voyage_common.monitoring import REFERENCE_FILE, install_monitor
+from voyage_common.profiling import install_profiler
+from voyage_common.shadow import PickledModel, ShadowEvaluator
+from voyage_common.threads import configure_threads
+
+# Single-row predictions run on one thread; BLAS gets this worker's share of the CPUs
+threads = configure_threads("serving")
+
 # Load the trained model and scaler
-model = pickle.load(open("rf_model.pkl", "rb"))
-scaler = pickle.load(open("scaler.pkl", "rb"))
+model = pickle.load(open(os.path.join(MODEL_DIR, "rf_model.pkl"), "rb"))
+scaler = pickle.load(open(os.path.join(MODEL_DIR, "scaler.pkl"), "rb"))
+# The forest is pickled with its training n_jobs; override it for serving
+threads.apply(model)
+
+# Opt-in request profiling (PROFILE_SAMPLE_RATE / PROFILE_ALLOW_HEADER), tagged with the model files
+install_profiler(app, "flight", BASE_DIR,
+                 model_files=[os.path.join(MODEL_DIR, "rf_model.pkl"), os.path.join(MODEL_DIR, "scaler.pkl")])
+
+# Bounded in-flight limit and queueing budget for /predict (ADMISSION_* settings); sheds load with 503
+admission = install_admission(app, "flight", paths=["/predict"])
+
+
+def load_shadow(model_dir):
+    """Mirror /predict inputs to the candidate model in model_dir, off the request path."""
+    print(f"🕶️  Shadow-evaluating the candidate model in {model_dir}")
+    return ShadowEvaluator(
+        "flight-candidate",
+        PickledModel(os.path.join(model_dir, "rf_model.pkl"), os.path.join(model_dir, "scaler.pkl")),
+        workers=int(os.environ.get("FLIGHT_SHADOW_WORKERS", "1")),
+        max_queue=int(os.environ.get("FLIGHT_SHADOW_MAX_QUEUE", "32")),
+        sample_rate=float(os.environ.get("FLIGHT_SHADOW_SAMPLE_RATE", "1")),
+        should_shed=admission.saturated if admission is not None else None,
+    )
+
+
+shadow = load_shadow(SHADOW_MODEL_DIR) if SHADOW_MODEL_DIR else None
+
+# Streaming sketches of the inputs and predictions, compared with the profile train_model.py wrote (GET /monitor)
+monitor = install_monitor(
+    app, "flight",
+    categorical=["route", "flightType", "agency", "month", "year"],
+    numeric={"day": [5, 10, 15, 20, 25], "price": [300, 500, 700, 900, 1100, 1300]},
+    reference_path=os.path.join(MODEL_DIR, REFERENCE_FILE),
+)
 
 # Feature order used during training (matches train_model.py)
 feature_order = [
@@ -75,31 +129,58 @@ def predict():
         input_features[feature_order.index("day")] = day
 
         # Scale input features
+        started = time.perf_counter()
         input_scaled = scaler.transform([input_features])  # Ensure correct transformation
 
         # Make prediction
         prediction = model.predict(input_scaled)[0]
+        predict_seconds = time.perf_counter() - started
+        if monitor is not None:
+            monitor.observe(route=f"{Departure} -> {Destination}", flightType=FlightType, agency=Agency,
+                            month=month, year=year, day=day, price=prediction)
         
-        # Generate visualization (Price Trend Graph)
-        plt.figure(figsize=(5, 3))
-        plt.bar(["Predicted Price"], [prediction], color="blue")
-        plt.ylabel("Price ($)")
-        plt.title("Flight Price Prediction")
-        plt.grid(axis="y")
-
-        # Convert plot to image
-        img = io.BytesIO()
-        plt.savefig(img, format="png")
-        img.seek(0)
-        plot_url = base64.b64encode(img.getvalue()).decode()
-
-        return render_template("index.html", prediction=round(prediction, 2), plot_url=plot_url)
-
-    except Exception as e:
-        import traceback
-        error_msg = f"Error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-        print(error_msg)  # Print to console for debugging
-        return f"<h2>Error occurred</h2><p>{str(e)}</p><pre>{traceback.format_exc()}</pre>"
+        # Under pressure the chart is skipped: it costs more than the prediction itself
+        if admission is not None and admission.degraded(request.environ):
+            response = app.make_response(render_template("index.html", prediction=round(prediction, 2)))
+            response.headers[DEGRADED_HEADER[0]] = DEGRADED_HEADER[1]
+        else:
+            # Generate visualization (Price Trend Graph)
+            plt.figure(figsize=(5, 3))
+            plt.bar(["Predicted Price"], [prediction], color="blue")
+            plt.ylabel("Price ($)")
+            plt.title("Flight Price Prediction")
+            plt.grid(axis="y")
+
+            # Convert plot to image
+            img = io.BytesIO()
+            plt.savefig(img, format="png")
+            plt.close()  # pyplot keeps every figure alive until it is closed
+            img.seek(0)
+            plot_url = base64.b64encode(img.getvalue()).decode()
+
+            response = app.make_response(
+                render_template("index.html", prediction=round(prediction, 2), plot_url=plot_url))
+
+    except (KeyError, ValueError) as e:
+        # Missing or non-numeric form fields
+        return render_template("index.html", prediction=None, error=f"Invalid input: {e}"), 400
+
+    except Exception:
+        # The traceback goes to the console only, never to the client
+        print(f"Error during prediction:\n{traceback.format_exc()}")
+        return render_template("index.html", prediction=None, error="Prediction failed, please try again."), 500
+
+    # Mirrored once the primary response is ready, outside the try: the candidate cannot change its status
+    if shadow is not None:
+        shadow.mirror(input_features, prediction, predict_seconds)
+    return response
+
+@app.route("/shadow")
+def shadow_stats():
+    # Streaming comparison of the candidate with the live model
+    if shadow is None:
+        return jsonify({"error": "shadow mode is off (set FLIGHT_SHADOW_MODEL_DIR)"}), 404
+    return jsonify(shadow.stats())
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
@@ -0,0 +1,218 @@
+"""
+Offline bulk scoring for the flight price model.
+
+Streams a CSV or Parquet file of candidate itineraries in chunks, encodes each
+chunk with the feature layout the model was trained on (see train_model.py),
+predicts across a pool of worker processes and appends the results to a
+Parquet file as they arrive. At most a few chunks per worker are in flight,
+so memory stays bounded however large the input is.
+
+Input columns: from, to (or destination), flightType, agency, and either date
+(as in flights.csv) or month, year and day. All input columns are kept in the
+output next to predicted_price.
+
+    python dags/utils/batch_scoring.py candidates.csv predictions.parquet --workers 8
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Feature order used during training (matches train_model.py and app.py)
+FEATURE_ORDER = [
+    "from_Florianopolis_SC", "from_Sao_Paulo_SP", "from_Salvador_BH", "from_Brasilia_DF",
+    "from_Rio_de_Janeiro_RJ", "from_Campo_Grande_MS", "from_Aracaju_SE", "from_Natal_RN", "from_Recife_PE",
+    "destination_Florianopolis_SC", "destination_Sao_Paulo_SP", "destination_Salvador_BH",
+    "destination_Brasilia_DF", "destination_Rio_de_Janeiro_RJ", "destination_Campo_Grande_MS",
+    "destination_Aracaju_SE", "destination_Natal_RN", "destination_Recife_PE",
+    "flightType_economic", "flightType_firstClass", "flightType_premium",
+    "agency_Rainbow", "agency_CloudFy", "agency_FlyingDrops",
+    "month", "year", "day"
+]
+FEATURE_POSITION = {name: i for i, name in enumerate(FEATURE_ORDER)}
+CATEGORICAL = ("from", "destination", "flightType", "agency")
+INPUT_COLUMNS = ["from", "destination", "flightType", "agency", "date", "month", "year", "day"]
+
+PREDICTION_COLUMN = "predicted_price"
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Loaded once per worker process by _init_worker
+_model = None
+_scaler = None
+
+
+def load_model(model_dir):
+    with open(os.path.join(model_dir, "rf_model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(model_dir, "scaler.pkl"), "rb") as f:
+        scaler = pickle.load(f)
+    return model, scaler
+
+
+def encode_chunk(chunk):
+    """
+    Feature matrix in FEATURE_ORDER for a chunk of itineraries. City names are
+    normalised the way the Flask form is, and unknown categories stay all-zero.
+    """
+    chunk = chunk.rename(columns={"to": "destination"})
+    X = np.zeros((len(chunk), len(FEATURE_ORDER)))
+    rows = np.arange(len(chunk))
+    for column in CATEGORICAL:
+        names = (column + "_" + chunk[column].astype(str)
+                 .str.replace(" (", "_", regex=False).str.replace("(", "", regex=False)
+                 .str.replace(")", "", regex=False).str.replace(" ", "_", regex=False))
+        positions = names.map(FEATURE_POSITION)
+        known = positions.notna().to_numpy()
+        X[rows[known], positions[known].to_numpy(dtype=int)] = 1
+
+    if "date" in chunk:
+        dates = pd.to_datetime(chunk["date"])
+        month, year, day = dates.dt.month, dates.dt.year, dates.dt.day
+    else:
+        month, year, day = chunk["month"], chunk["year"], chunk["day"]
+    X[:, FEATURE_POSITION["month"]] = month
+    X[:, FEATURE_POSITION["year"]] = year
+    X[:, FEATURE_POSITION["day"]] = day
+    if np.isnan(X).any():
+        raise ValueError("Missing date values in input chunk")
+    return X
+
+
+def predict_chunk(model, scaler, chunk):
+    return model.predict(scaler.transform(encode_chunk(chunk)))
+
+
+def _load_single_threaded(model_dir):
+    # Parallelism comes from the worker processes; one thread each avoids oversubscription
+    model, scaler = load_model(model_dir)
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    return model, scaler
+
+
+def _init_worker(model_dir):
+    global _model, _scaler
+    _model, _scaler = _load_single_threaded(model_dir)
+
+
+def _score_in_worker(chunk):
+    return predict_chunk(_model, _scaler, chunk)
+
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """DataFrames of at most chunk_size rows, read lazily from a CSV or Parquet file."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ParquetAppender:
+    """Writes DataFrames to one Parquet file as row groups, using the first chunk's schema."""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(frame, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _score_serial(chunks, model_dir):
+    model, scaler = _load_single_threaded(model_dir)
+    for chunk in chunks:
+        yield chunk, predict_chunk(model, scaler, chunk)
+
+
+def _scoring_columns(chunk):
+    # Only the columns encode_chunk reads are sent to the workers
+    return [column for column in chunk.columns if column in INPUT_COLUMNS or column == "to"]
+
+
+def _score_parallel(chunks, model_dir, workers, max_in_flight):
+    # Results come back in input order; submission pauses while max_in_flight chunks are pending
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_dir,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_score_in_worker, chunk[_scoring_columns(chunk)])))
+            if len(pending) >= max_in_flight:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def score_file(input_path, output_path, model_dir, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+               report_every=10.0):
+    """
+    Score input_path into output_path and return (rows, seconds). workers
+    defaults to the CPU count; with one worker everything runs in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_chunks(input_path, chunk_size)
+    if workers == 1:
+        scored = _score_serial(chunks, model_dir)
+    else:
+        scored = _score_parallel(chunks, model_dir, workers, max_in_flight=2 * workers)
+
+    print(f"🚀 Scoring {input_path} with {workers} worker(s), {chunk_size:,} rows per chunk")
+    output = ParquetAppender(output_path)
+    start = last_report = time.perf_counter()
+    rows = 0
+    try:
+        for chunk, predictions in scored:
+            chunk = chunk.assign(**{PREDICTION_COLUMN: np.round(predictions, 2)})
+            output.write(chunk)
+            rows += len(chunk)
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"   {rows:,} rows, {rows / (now - start):,.0f} rows/s")
+                last_report = now
+    finally:
+        output.close()
+
+    seconds = time.perf_counter() - start
+    print(f"✅ Scored {rows:,} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s) → {output_path}")
+    return rows, seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch flight price predictions")
+    parser.add_argument("input", help="CSV or Parquet file of itineraries")
+    parser.add_argument("output", help="Parquet file to write")
+    parser.add_argument("--model-dir", default=os.environ.get("FLIGHT_MODEL_DIR", "."),
+                        help="Folder with rf_model.pkl and scaler.pkl")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--report-every", type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    score_file(args.input, args.output, args.model_dir, args.chunk_size, args.workers, args.report_every)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+CITIES = ['Aracaju (SE)', 'Brasilia (DF)', 'Campo Grande (MS)', 'Florianopolis (SC)', 'Natal (RN)',
+          'Recife (PE)', 'Rio de Janeiro (RJ)', 'Salvador (BH)', 'Sao Paulo (SP)']
+
+# Fixed one-hot vocabulary, sorted as pd.get_dummies sorts it, so every partition yields the same
+# columns in the same order (a category a partition lacks is an all-zero column; unknown values are ignored)
+CATEGORIES = {
+    'from': CITIES,
+    'destination': CITIES,
+    'flightType': ['economic', 'firstClass', 'premium'],
+    'agency': ['CloudFy', 'FlyingDrops', 'Rainbow'],
+}
+
+
+def transform_frame(data):
+    """
+    Transform the flight data for model training.
+    Returns X (features) and Y (target) as separate DataFrames/Series.
+    """
+    df = data.copy()
+    
+    # Drop any rows with missing values
+    df = df.dropna()
+    
+    # Convert date to datetime
+    df['date'] = pd.to_datetime(df['date'])
+    
+    # Extract date features
+    df['week_day'] = df['date'].dt.weekday
+    df['month'] = df['date'].dt.month
+    df['week_no'] = df['date'].dt.isocalendar().week
+    df['year'] = df['date'].dt.year
+    df['day'] = df['date'].dt.day
+    
+    # Rename 'to' column to 'destination'
+    df.rename(columns={"to": "destination"}, inplace=True)
+    
+    # Create flight speed feature
+    df['flight_speed'] = round(df['distance'] / df['time'], 2)
+    
+    # One-hot encode categorical variables
+    for column, categories in CATEGORIES.items():
+        df[column] = pd.Categorical(df[column], categories=categories)
+    df = pd.get_dummies(df, columns=list(CATEGORIES))
+    
+    # Drop irrelevant features
+    df.drop(columns=['time', 'flight_speed', 'month', 'year', 'distance', 'date'], inplace=True)
+    
+    # Rename columns with spaces to use underscores
+    df.columns = df.columns.str.replace(' ', '_')
+    df.columns = df.columns.str.replace('(', '')
+    df.columns = df.columns.str.replace(')', '')
+    
+    # Separate features (X) and target variable (Y)
+    X = df.drop('price', axis=1)  # Features
+    Y = df['price']               # Target variable
+    
+    return X, Y
+
+
+def _transform_partition(loader, partition):
+    # Runs in a worker: read and transform one partition (frame by frame for a streamed source)
+    # into plain arrays. float32 is the dtype the forest trains on, so fit() does not convert it again.
+    Xs, Ys, columns = [], [], None
+    for frame in loader.iter_frames(partition):
+        X, Y = transform_frame(frame)
+        Xs.append(X.to_numpy(dtype=np.float32))
+        Ys.append(Y.to_numpy(dtype=np.float64))
+        columns = list(X.columns)
+    return Xs, Ys, columns
+
+
 class DataTransformer:  
-    def __init__(self, data):  
+    def __init__(self, data, workers=None):  
+        """
+        data is a DataFrame of flights, or a DataLoader whose partitions are
+        read and transformed in up to `workers` processes (default: CPU count),
+        or a DatabaseLoader whose chunks are transformed as they stream in.
+        """
         self.data = data  
+        self.workers = workers
 
     def transform(self):  
         """
         Transform the flight data for model training.
         Returns X (features) and Y (target) as separate DataFrames/Series.
         """
-        df = self.data.copy()
-        
-        # Drop any rows with missing values
-        df = df.dropna()
-        
-        # Convert date to datetime
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Extract date features
-        df['week_day'] = df['date'].dt.weekday
-        df['month'] = df['date'].dt.month
-        df['week_no'] = df['date'].dt.isocalendar().week
-        df['year'] = df['date'].dt.year
-        df['day'] = df['date'].dt.day
-        
-        # Rename 'to' column to 'destination'
-        df.rename(columns={"to": "destination"}, inplace=True)
-        
-        # Create flight speed feature
-        df['flight_speed'] = round(df['distance'] / df['time'], 2)
-        
-        # One-hot encode categorical variables
-        df = pd.get_dummies(df, columns=['from', 'destination', 'flightType', 'agency'])
-        
-        # Drop irrelevant features
-        df.drop(columns=['time', 'flight_speed', 'month', 'year', 'distance', 'date'], axis=1, inplace=True)
-        
-        # Rename columns with spaces to use underscores
-        df.columns = df.columns.str.replace(' ', '_')
-        df.columns = df.columns.str.replace('(', '')
-        df.columns = df.columns.str.replace(')', '')
-        
-        # Separate features (X) and target variable (Y)
-        X = df.drop('price', axis=1)  # Features
-        Y = df['price']               # Target variable
-        
-        return X, Y
+        if isinstance(self.data, pd.DataFrame):
+            return transform_frame(self.data)
+        return self.transform_partitions()
+
+    def transform_partitions(self):
+        """
+        X and Y over every partition of the DataLoader. X is a float32 DataFrame:
+        the partitions' matrices are copied once, into the training matrix.
+        """
+        partitions = self.data.partitions()
+        if not partitions:
+            raise FileNotFoundError(f"No partitions in {self.data.file_path} between {self.data.start} and {self.data.end}")
+        workers = min(self.workers or os.cpu_count() or 1, len(partitions))
+        if workers == 1:
+            parts = [_transform_partition(self.data, partition) for partition in partitions]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_transform_partition, [self.data] * len(partitions), partitions))
+
+        columns = next((part[2] for part in parts if part[2] is not None), None)
+        if columns is None:
+            raise ValueError(f"No rows in {self.data.file_path} between {self.data.start} and {self.data.end}")
+        X = np.concatenate([X for part in parts for X in part[0]])
+        Y = np.concatenate([Y for part in parts for Y in part[1]])
+        del parts
+        return pd.DataFrame(X, columns=columns, copy=False), pd.Series(Y, name='price', copy=False)
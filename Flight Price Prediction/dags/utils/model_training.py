@@ -1,11 +1,12 @@
 from sklearn.ensemble import RandomForestRegressor
 
 class RandomForestModel:
-    def __init__(self, X, Y):
+    def __init__(self, X, Y, n_jobs=None):
         self.X = X
         self.Y = Y
+        self.n_jobs = n_jobs
 
     def random_forest(self):
-        model = RandomForestRegressor()
+        model = RandomForestRegressor(n_jobs=self.n_jobs)
         model.fit(self.X, self.Y)
         return model
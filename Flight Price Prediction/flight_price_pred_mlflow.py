@@ -1,5 +1,7 @@
 #Import Libraries:
-import mlflow
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 import logging
@@ -9,19 +11,27 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor
 
+#Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from voyage_common.threads import configure_threads
+from voyage_common.tracking import ExperimentTracker
+
+#The grid search runs folds in parallel; each forest inside it gets one thread
+threads = configure_threads("tuning")
+
 
 #Configure Logging:
 logging.basicConfig(level=logging.WARN)
 logger = logging.getLogger(__name__)
 
-#Set MLflow Tracking URI:
-mlflow.set_tracking_uri("http://127.0.0.1:8000")
+#Start a tracked run: logging is buffered and sent in the background, or spooled locally if the server is down
+tracker = ExperimentTracker("Flight_package_prediction",
+                            tracking_uri=os.environ.get("MLFLOW_TRACKING_URI", "http://127.0.0.1:8000"))
 
-#Start an MLflow Run:
-mlflow.start_run()
-#mlflow.create_experiment("Flight_package_prediction")
 #Load Data:
-df = pd.read_csv("flights.csv")
+with tracker.stage("load_data"):
+    df = pd.read_csv("flights.csv")
+features_start = time.perf_counter()
 
 # Change travel date into a datetime object
 df['date'] = pd.to_datetime(df['date'])
@@ -44,7 +54,7 @@ df = pd.get_dummies(df, columns=['from','destination','flightType','agency'])
 
         
 #Dropping irrelavent features
-df.drop(columns=['time','flight_speed','month','year','distance'],axis=1,inplace=True)
+df.drop(columns=['time','flight_speed','month','year','distance'],inplace=True)
         
 #Separate features (X) and target variable (Y)
 X = df.drop('price', axis=1)  # Features
@@ -64,6 +74,8 @@ features_ordering=['from_Florianopolis (SC)','from_Sao_Paulo (SP)','from_Salvado
 #Ordering features based on flask output
 X= X[features_ordering]
 
+tracker.log_stage("feature_engineering", time.perf_counter() - features_start)
+
 #Split Data into Train and Test Sets:
 X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=0.20, random_state=42)
 
@@ -77,20 +89,22 @@ param_dict = {
             'n_estimators': [300],
             'max_depth': [15],
             'min_samples_split': [10],
-            'max_features': ['sqrt',27],
-            'n_jobs': [2]
+            'max_features': ['sqrt',27]
         }
 rf_model = RandomForestRegressor(random_state=42)
 rf_grid = GridSearchCV(estimator=rf_model,
                                      param_grid=param_dict,
                                      cv=3, verbose=2, scoring='r2')
+threads.apply(rf_grid)
 
-rf_grid.fit(X_train, Y_train) 
+with tracker.stage("grid_search"):
+    rf_grid.fit(X_train, Y_train) 
             
 rf_optimal_model = rf_grid.best_estimator_
 
-Y_train_pred = rf_optimal_model.predict(X_train)
-Y_test_pred = rf_optimal_model.predict(X_test)
+with tracker.stage("predict"):
+    Y_train_pred = rf_optimal_model.predict(X_train)
+    Y_test_pred = rf_optimal_model.predict(X_test)
 
 actual=Y_test
 predicted=Y_test_pred
@@ -101,21 +115,15 @@ MAE = mean_absolute_error(actual, predicted)
 RMSE = np.sqrt(MSE)
 R2 = r2_score(actual, predicted) 
 
-#Log Parameters and Metrics to MLflow:
-mlflow.log_param("test_size", 0.3)
-mlflow.log_param("random_state", 42)
-mlflow.log_param("n_estimators", 300)
-mlflow.log_param("max_depth", 15)
-mlflow.log_metric("MAE", MAE)
-mlflow.log_metric("MSE", MSE)
-mlflow.log_metric("RMSE", RMSE)
-mlflow.log_metric("R2", R2)
+#Log Parameters and Metrics:
+tracker.log_params({"test_size": 0.2, "random_state": 42, **rf_grid.best_params_})
+tracker.log_metrics({"MAE": MAE, "MSE": MSE, "RMSE": RMSE, "R2": R2})
 
-#Log the Trained Model to MLflow:
-mlflow.sklearn.log_model(rf_optimal_model, "random_forest_model")
+#Log the Trained Model (saved and uploaded in the background):
+tracker.log_model(rf_optimal_model, "random_forest_model")
 
 #Register the Model Version:
 #mlflow.register_model("runs:/<RUN_ID>/random_forest_model", "FlightPackagePriceModel")
 
-#End the MLflow Run:
-mlflow.end_run()
\ No newline at end of file
+#End the Run: waits for the buffered logging and the model upload (or their spooling)
+tracker.close()
\ No newline at end of file
@@ -1,6 +1,8 @@
 """
 Script to train and save the Random Forest model and scaler for the Flask app
 """
+import os
+import sys
 import pandas as pd
 import numpy as np
 import pickle
@@ -9,12 +11,22 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from voyage_common.monitoring import REFERENCE_FILE, build_reference, save_reference
+from voyage_common.threads import configure_threads
+from voyage_common.tracking import ExperimentTracker
+
 print("🚀 Training Flight Price Prediction Model...")
 print("=" * 50)
+threads = configure_threads("training")
+# Buffered, sent in the background; spooled to tracking-spool/ when MLFLOW_TRACKING_URI is unset or unreachable
+tracker = ExperimentTracker("flight_price_training")
 
 # Load Data
 print("\n📊 Loading data...")
-df = pd.read_csv("dags/data/flights.csv")
+with tracker.stage("load_data"):
+    df = pd.read_csv("dags/data/flights.csv")
 print(f"   Loaded {len(df)} records")
 
 # Convert date to datetime
@@ -27,6 +39,12 @@ df['week_no'] = df['date'].dt.isocalendar().week
 df['year'] = df['date'].dt.year
 df['day'] = df['date'].dt.day
 
+# Raw inputs as the app's monitor sees them, for the reference profile
+reference_frame = pd.DataFrame({
+    "route": df['from'] + " -> " + df['to'], "flightType": df['flightType'], "agency": df['agency'],
+    "month": df['month'], "year": df['year'], "day": df['day'],
+})
+
 # Rename column
 df.rename(columns={"to": "destination"}, inplace=True)
 
@@ -38,7 +56,7 @@ print("\n🔄 Encoding categorical variables...")
 df = pd.get_dummies(df, columns=['from', 'destination', 'flightType', 'agency'])
 
 # Drop irrelevant features
-df.drop(columns=['time', 'flight_speed', 'distance', 'date'], axis=1, inplace=True)
+df.drop(columns=['time', 'flight_speed', 'distance', 'date'], inplace=True)
 
 # Rename columns with spaces to match expected format
 df.columns = df.columns.str.replace(' ', '_')
@@ -92,9 +110,10 @@ rf_model = RandomForestRegressor(
     min_samples_split=10,
     max_features='sqrt',
     random_state=42,
-    n_jobs=-1
+    n_jobs=threads.n_jobs
 )
-rf_model.fit(X_train_scaled, Y_train)
+with tracker.stage("fit"):
+    rf_model.fit(X_train_scaled, Y_train)
 
 # Make predictions
 Y_train_pred = rf_model.predict(X_train_scaled)
@@ -111,9 +130,13 @@ print(f"   Mean Absolute Error (MAE): {mae:.2f}")
 print(f"   Mean Squared Error (MSE): {mse:.2f}")
 print(f"   Root Mean Squared Error (RMSE): {rmse:.2f}")
 print(f"   R² Score: {r2:.4f}")
+tracker.log_params({"n_estimators": 300, "max_depth": 15, "min_samples_split": 10, "max_features": "sqrt",
+                    "test_size": 0.2, "n_jobs": threads.n_jobs})
+tracker.log_metrics({"MAE": mae, "MSE": mse, "RMSE": rmse, "R2": r2})
 
-# Save model and scaler
+# Save model and scaler (without the training parallelism; serving sets its own thread budget)
 print("\n💾 Saving model files...")
+rf_model.n_jobs = 1
 with open("rf_model.pkl", "wb") as f:
     pickle.dump(rf_model, f)
 print("   ✓ Saved: rf_model.pkl")
@@ -122,6 +145,17 @@ with open("scaler.pkl", "wb") as f:
     pickle.dump(scaler, f)
 print("   ✓ Saved: scaler.pkl")
 
+# Reference profile for drift monitoring: test-set inputs and the model's predictions on them
+reference_frame = reference_frame.loc[X_test.index].assign(price=Y_test_pred)
+save_reference(build_reference(reference_frame, categorical=["route", "flightType", "agency", "month", "year"],
+                               numeric=["day", "price"]), REFERENCE_FILE)
+print(f"   ✓ Saved: {REFERENCE_FILE}")
+
+tracker.log_artifact("rf_model.pkl", "model")
+tracker.log_artifact(REFERENCE_FILE, "model")
+tracker.log_artifact("scaler.pkl", "model")
+tracker.close()
+
 print("\n✅ Model training completed successfully!")
 print("=" * 50)
 print("\n📝 Next steps:")
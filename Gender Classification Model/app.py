@@ -1,38 +1,43 @@
 # Example of a Flask endpoint for model inference
+import os
+import sys
 from flask import Flask, request, jsonify, redirect, url_for
-import pickle  # For model serialization
-import joblib
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.preprocessing import LabelEncoder
 
-# Initialize the SentenceTransformer model
-try:
-    model = SentenceTransformer('flax-sentence-embeddings/all_datasets_v4_MiniLM-L6')
-except Exception as e:
-    print(f"Warning: Could not load SentenceTransformer: {e}")
-    model = None
-
-# Load the trained classification model and scaler model
-try:
-    scaler_model = joblib.load(open("scaler.pkl", 'rb'))
-    pca_model = joblib.load(open("pca.pkl", 'rb'))
-    logistic_model = pickle.load(open("tuned_logistic_regression_model.pkl", 'rb'))
-    models_loaded = True
-except FileNotFoundError as e:
-    print(f"Warning: Model files not found: {e}")
-    print("Please train the model first or provide the model files.")
-    scaler_model = None
-    pca_model = None
-    logistic_model = None
-    models_loaded = False
-except Exception as e:
-    print(f"Error loading models: {e}")
-    models_loaded = False
+from startup import ModelStartup
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(BASE_DIR))
+from voyage_common.admission import install_admission
+from voyage_common.monitoring import REFERENCE_FILE, install_monitor
+from voyage_common.profiling import install_profiler
+from voyage_common.threads import configure_threads
+
+# Set before the background loader imports torch, which reads the thread limit once
+configure_threads("serving")
+
+# Sample travellers pushed through the full pipeline once the models are loaded,
+# so the first real request does not pay for lazy initialisation
+WARMUP_INPUTS = [
+    {'code': 0, 'company': 'Acme Factory', 'name': 'Charlotte Johnson', 'age': 30},
+    {'code': 1, 'company': 'Wonka Company', 'name': 'James Smith', 'age': 45},
+    {'code': 2, 'company': '4You', 'name': 'Mary Garcia', 'age': 27},
+]
+
+
+def warmup(artifacts):
+    artifacts['encoder'].encode([row['name'] for row in WARMUP_INPUTS])
+    for row in WARMUP_INPUTS:
+        predict_price(row, artifacts['classifier'], artifacts['pca'], artifacts['scaler'],
+                      encoder=artifacts['encoder'])
+
 
 # Create a function for prediction
-def predict_price(input_data, lr_model, pca, scaler):
+def predict_price(input_data, lr_model, pca, scaler, encoder=None):
     # Prepare the input data
     text_columns = ['name']
 
@@ -50,11 +55,13 @@ def predict_price(input_data, lr_model, pca, scaler):
     #df['gender_encoded'] = label_encoder.fit_transform(df['gender'])
     
     # Encode text-based columns and create embeddings
-    if model is None:
+    if encoder is None:
+        encoder = startup.artifacts.get('encoder')
+    if encoder is None:
         raise ValueError("SentenceTransformer model not loaded. Please install sentence-transformers.")
     
     for column in text_columns:
-        df[column + '_embedding'] = df[column].apply(lambda text: model.encode(text))
+        df[column + '_embedding'] = df[column].apply(lambda text: encoder.encode(text))
 
     # Apply PCA separately to each text embedding column
     n_components = 23  # Adjust the number of components as needed
@@ -83,9 +90,43 @@ def predict_price(input_data, lr_model, pca, scaler):
     return y_pred[0]
 
 
+# Load the SentenceTransformer, scaler, PCA and classification models in the background.
+# Started once everything warmup() calls is defined
+startup = ModelStartup(BASE_DIR, warmup_fn=warmup)
+startup.start()
 
 app = Flask(__name__)
 
+# Opt-in request profiling (PROFILE_SAMPLE_RATE / PROFILE_ALLOW_HEADER), tagged with the model files
+install_profiler(app, "gender", BASE_DIR, model_files=[
+    os.path.join(BASE_DIR, name) for name in ('scaler.pkl', 'pca.pkl', 'tuned_logistic_regression_model.pkl')])
+
+# Bounded in-flight limit and queueing budget for /predict (ADMISSION_* settings); sheds load with 503
+admission = install_admission(app, "gender", paths=['/predict'])
+
+# Streaming sketches of the inputs and predictions, compared with the profile training wrote (GET /monitor)
+monitor = install_monitor(
+    app, "gender",
+    categorical=['company', 'first_name', 'gender'],
+    numeric={'age': [25, 30, 35, 40, 45, 50, 55, 60], 'code': [200, 400, 600, 800, 1000, 1200]},
+    reference_path=os.path.join(BASE_DIR, REFERENCE_FILE),
+)
+
+
+@app.route('/healthz')
+def healthz():
+    # Liveness: the process is up, whatever state the models are in
+    status = startup.status()
+    if admission is not None:
+        status['admission'] = admission.stats()
+    return jsonify(status), 200
+
+
+@app.route('/readyz')
+def readyz():
+    # Readiness: only route traffic here once the models are loaded and warm
+    return jsonify(startup.status()), (200 if startup.is_ready() else 503)
+
 @app.route('/', methods=['GET', 'POST'])
 def predict():
     prediction_result = request.args.get('prediction', '')
@@ -202,7 +243,7 @@ def predict():
 <body>
     <div class="container">
         <h1>Gender Classification Model</h1>
-        <form action="/predict" method="POST">
+        <form action="{url_for('index')}" method="POST">
             <label for="Username">Username:</label>
             <input type="text" name="Username" placeholder="Enter name of traveller" value="Charlotte Johnson">
             
@@ -237,8 +278,11 @@ def predict():
 def index():
     if request.method == 'POST':
         try:
-            if not models_loaded:
-                error_msg = 'Model files not found. Please train the model first or provide the required .pkl files (scaler.pkl, pca.pkl, tuned_logistic_regression_model.pkl).'
+            if not startup.is_ready():
+                if startup.state == 'failed':
+                    error_msg = 'Model files not found. Please train the model first or provide the required .pkl files (scaler.pkl, pca.pkl, tuned_logistic_regression_model.pkl).'
+                else:
+                    error_msg = 'Models are still loading. Please try again in a few seconds.'
                 return redirect(url_for('predict', error=error_msg))
             
             # Get input data from the form
@@ -261,12 +305,17 @@ def index():
             }
 
             # Perform prediction using the custom_input dictionary
-            prediction = predict_price(data, logistic_model, pca_model, scaler_model)
+            artifacts = startup.artifacts
+            prediction = predict_price(data, artifacts['classifier'], artifacts['pca'], artifacts['scaler'],
+                                       encoder=artifacts['encoder'])
             
             if prediction == 0:
                 gender = 'female'
             else:
                 gender = 'male'
+            if monitor is not None:
+                monitor.observe(company=company, first_name=name.split()[0] if name.split() else None,
+                                gender=gender, age=data['age'], code=data['code'])
             
             # Redirect back to home page with prediction result
             return redirect(url_for('predict', prediction=gender))
@@ -0,0 +1,133 @@
+"""
+Embedding pipeline for the Gender Classification training script.
+
+Names are deduplicated, encoded in chunks across a process pool and written
+to a float32 .npy memmap keyed by a hash of the dataset, so reruns on the same
+data skip encoding entirely. PCA is fitted with IncrementalPCA over row
+batches read from the memmap, which keeps memory bounded for millions of users.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.decomposition import IncrementalPCA
+
+from startup import SENTENCE_MODEL_NAME, load_sentence_model
+
+# Set once per worker process by _init_worker
+_worker_model = None
+
+
+def dataset_hash(unique_names, model_name=SENTENCE_MODEL_NAME):
+    """Hash of the embedding model and the (sorted, unique) names it encodes."""
+    digest = hashlib.sha256(model_name.encode('utf-8'))
+    for name in unique_names:
+        digest.update(str(name).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+def _init_worker(model_name, torch_threads):
+    global _worker_model
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+    _worker_model = load_sentence_model(model_name)
+
+
+def _encode_chunk(names):
+    return np.asarray(_worker_model.encode(names, show_progress_bar=False), dtype=np.float32)
+
+
+def _chunks(items, chunk_size):
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+def encode_unique_names(unique_names, cache_dir, model_name=SENTENCE_MODEL_NAME,
+                        chunk_size=2048, workers=None):
+    """
+    Return a read-only (n_unique, dim) float32 memmap of embeddings for
+    unique_names, encoding only when no cached file exists for this dataset.
+    With no names it returns an empty (0, dim) array.
+    """
+    if len(unique_names) == 0:
+        dim = load_sentence_model(model_name).get_sentence_embedding_dimension()
+        return np.empty((0, dim), dtype=np.float32)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, f"{dataset_hash(unique_names, model_name)}.npy")
+    if os.path.exists(cache_path):
+        print(f"   ✓ Reusing cached embeddings: {cache_path}")
+        return np.load(cache_path, mmap_mode='r')
+
+    unique_names = [str(name) for name in unique_names]
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, -(-len(unique_names) // chunk_size)))
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    # Write to a temporary file and rename once complete, so an interrupted
+    # run never leaves a partial cache behind
+    tmp_path = cache_path + '.tmp'
+    embeddings = None
+    offset = 0
+
+    if workers == 1:
+        _init_worker(model_name, None)
+        results = map(_encode_chunk, _chunks(unique_names, chunk_size))
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(model_name, torch_threads))
+        results = pool.map(_encode_chunk, _chunks(unique_names, chunk_size))
+
+    try:
+        for chunk in results:
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(
+                    tmp_path, mode='w+', dtype=np.float32,
+                    shape=(len(unique_names), chunk.shape[1]))
+            embeddings[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+            print(f"   Encoded {offset}/{len(unique_names)} unique names", end='\r')
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print()
+
+    embeddings.flush()
+    del embeddings
+    os.replace(tmp_path, cache_path)
+    print(f"   ✓ Cached embeddings: {cache_path}")
+    return np.load(cache_path, mmap_mode='r')
+
+
+def _row_batches(n_rows, batch_size, min_size):
+    # Equal-sized batches, none smaller than min_size (IncrementalPCA needs
+    # at least n_components samples per partial_fit call)
+    n_batches = max(1, min(-(-n_rows // batch_size), n_rows // min_size))
+    return np.array_split(np.arange(n_rows), n_batches)
+
+
+def fit_incremental_pca(embeddings, row_index, n_components, batch_size=10000):
+    """
+    Fit IncrementalPCA on embeddings[row_index] without materialising the
+    full per-row embedding matrix. row_index maps every training row to its
+    unique-name embedding, so duplicates keep their weight as with plain PCA.
+    """
+    pca = IncrementalPCA(n_components=n_components)
+    for batch in _row_batches(len(row_index), batch_size, n_components):
+        pca.partial_fit(embeddings[np.sort(row_index[batch])])
+    return pca
+
+
+def transform_in_batches(pca, embeddings, batch_size=10000):
+    """PCA-transform every row of embeddings, batch by batch, as float32."""
+    out = np.empty((len(embeddings), pca.n_components_), dtype=np.float32)
+    for start in range(0, len(embeddings), batch_size):
+        out[start:start + batch_size] = pca.transform(embeddings[start:start + batch_size])
+    return out
@@ -0,0 +1,135 @@
+"""
+Startup subsystem for the Gender Classification Flask app.
+
+Loads the SentenceTransformer and the pickled scaler, PCA and logistic
+regression models in parallel threads, runs a warm-up inference batch and
+records how long every stage of the cold start took. The app exposes the
+resulting state through /healthz and /readyz.
+"""
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+
+SENTENCE_MODEL_NAME = 'flax-sentence-embeddings/all_datasets_v4_MiniLM-L6'
+
+STATE_PENDING = 'pending'
+STATE_LOADING = 'loading'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+
+
+def load_sentence_model(name=SENTENCE_MODEL_NAME):
+    # Imported lazily so that importing the app does not pay for torch
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+class ModelStartup:
+    """Loads the model artifacts once in the background and tracks readiness."""
+
+    def __init__(self, base_dir, warmup_fn=None, sentence_model_name=SENTENCE_MODEL_NAME):
+        self.base_dir = base_dir
+        self.warmup_fn = warmup_fn
+        self.sentence_model_name = sentence_model_name
+
+        self.artifacts = {}
+        self.errors = {}
+        self.timings = {}
+        self.state = STATE_PENDING
+
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+
+    def _path(self, filename):
+        return os.path.join(self.base_dir, filename)
+
+    def _loaders(self):
+        return {
+            'encoder': lambda: load_sentence_model(self.sentence_model_name),
+            'scaler': lambda: joblib.load(self._path('scaler.pkl')),
+            'pca': lambda: joblib.load(self._path('pca.pkl')),
+            'classifier': lambda: _load_pickle(self._path('tuned_logistic_regression_model.pkl')),
+        }
+
+    def _timed(self, stage, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.timings[stage] = round(time.perf_counter() - start, 4)
+
+    def start(self):
+        """Start loading in a daemon thread; returns immediately."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = STATE_LOADING
+            self._thread = threading.Thread(target=self.run, name='model-startup', daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Load every artifact in parallel, then warm up. Blocks until done."""
+        self.state = STATE_LOADING
+        start = time.perf_counter()
+        loaders = self._loaders()
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix='model-load') as pool:
+                futures = {
+                    name: pool.submit(self._timed, 'load_' + name, loader)
+                    for name, loader in loaders.items()
+                }
+                for name, future in futures.items():
+                    try:
+                        self.artifacts[name] = future.result()
+                    except Exception as e:
+                        print(f"Warning: Could not load {name}: {e}")
+                        self.errors[name] = str(e)
+
+            if self.errors:
+                self.state = STATE_FAILED
+                return
+
+            if self.warmup_fn is not None:
+                try:
+                    self._timed('warmup', self.warmup_fn, self.artifacts)
+                except Exception as e:
+                    print(f"Warning: Warm-up inference failed: {e}")
+                    self.errors['warmup'] = str(e)
+                    self.state = STATE_FAILED
+                    return
+
+            self.state = STATE_READY
+        finally:
+            with self._lock:
+                self.timings['total'] = round(time.perf_counter() - start, 4)
+            self._done.set()
+
+    def wait(self, timeout=None):
+        """Wait for loading to finish; returns True when the models are ready."""
+        self._done.wait(timeout)
+        return self.is_ready()
+
+    def is_ready(self):
+        return self.state == STATE_READY
+
+    def status(self):
+        with self._lock:
+            timings = dict(self.timings)
+        return {
+            'state': self.state,
+            'loaded': sorted(self.artifacts),
+            'errors': dict(self.errors),
+            'timings_seconds': timings,
+        }
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
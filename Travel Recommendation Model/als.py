@@ -0,0 +1,128 @@
+"""
+Implicit-feedback matrix factorization (ALS) for the hotel recommender.
+
+Bookings are turned into a sparse user x hotel CSR matrix of interaction
+counts r. Following Hu, Koren & Volinsky, every observed pair gets preference
+1 and confidence 1 + alpha * r, unobserved pairs preference 0 and confidence 1.
+Each ALS half-step solves the regularised least-squares system for all users
+(or all hotels) at once with a few conjugate-gradient iterations, using only
+dense NumPy products and sparse SciPy matrix products - no Python loop over
+users. Factors are kept as C-contiguous float32 arrays.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+def build_interactions(user_ids, item_ids, n_users, n_items, weights=None):
+    """CSR user x item matrix; repeated (user, item) pairs are summed."""
+    data = np.ones(len(user_ids), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    interactions = sp.csr_matrix((data, (user_ids, item_ids)), shape=(n_users, n_items), dtype=np.float32)
+    interactions.sum_duplicates()
+    return interactions
+
+
+class ImplicitALS:
+    def __init__(self, factors=32, regularization=0.1, alpha=40.0, iterations=10, cg_steps=3, seed=42):
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        self.cg_steps = cg_steps
+        self.seed = seed
+
+        self.user_factors = None
+        self.item_factors = None
+        # Original identifiers for the matrix rows/columns (set by fit_bookings)
+        self.user_codes = None
+        self.item_names = None
+        self.fit_seconds = None
+
+    def fit(self, interactions):
+        """Fit factors to a CSR user x item matrix of interaction counts."""
+        start = time.perf_counter()
+        user_items = sp.csr_matrix(interactions, dtype=np.float32)
+        item_users = user_items.T.tocsr()
+        n_users, n_items = user_items.shape
+
+        rng = np.random.default_rng(self.seed)
+        user_factors = rng.normal(0, 0.01, (n_users, self.factors)).astype(np.float32)
+        item_factors = rng.normal(0, 0.01, (n_items, self.factors)).astype(np.float32)
+
+        for _ in range(self.iterations):
+            self._solve(user_items, user_factors, item_factors)
+            self._solve(item_users, item_factors, user_factors)
+
+        self.user_factors = np.ascontiguousarray(user_factors)
+        self.item_factors = np.ascontiguousarray(item_factors)
+        self.fit_seconds = time.perf_counter() - start
+        return self
+
+    def fit_bookings(self, bookings_df, user_column="userCode", item_column="name"):
+        """Fit from a bookings table, keeping the user codes and hotel names."""
+        user_ids, self.user_codes = pd.factorize(bookings_df[user_column], sort=True)
+        item_ids, self.item_names = pd.factorize(bookings_df[item_column], sort=True)
+        self.user_codes = np.asarray(self.user_codes)
+        self.item_names = np.asarray(self.item_names, dtype=object)
+        return self.fit(build_interactions(user_ids, item_ids, len(self.user_codes), len(self.item_names)))
+
+    def _solve(self, confidence, X, Y):
+        """
+        One ALS half-step, in place: for every row u of X solve
+            (Y^T C_u Y + reg * I) x_u = Y^T C_u p_u
+        with conjugate gradient, warm-started from the current X.
+        """
+        rows = np.repeat(np.arange(confidence.shape[0]), np.diff(confidence.indptr))
+        extra_confidence = (self.alpha * confidence.data).astype(np.float32)  # C_u - I on observed pairs
+        YtY = Y.T @ Y + self.regularization * np.eye(Y.shape[1], dtype=np.float32)
+        Y_observed = Y[confidence.indices]
+
+        def apply_A(P):
+            # Y^T Y P + reg P, plus the sparse correction sum_i (c_ui - 1) (y_i . p_u) y_i
+            weights = extra_confidence * np.einsum('ij,ij->i', Y_observed, P[rows])
+            correction = sp.csr_matrix((weights, confidence.indices, confidence.indptr), shape=confidence.shape)
+            return P @ YtY + correction @ Y
+
+        # Right-hand side: sum over observed items of c_ui * y_i (p_ui = 1)
+        b = sp.csr_matrix((1 + extra_confidence, confidence.indices, confidence.indptr),
+                          shape=confidence.shape) @ Y
+
+        residual = b - apply_A(X)
+        direction = residual.copy()
+        rs_old = np.einsum('ij,ij->i', residual, residual)
+        for _ in range(self.cg_steps):
+            A_direction = apply_A(direction)
+            step = rs_old / np.maximum(np.einsum('ij,ij->i', direction, A_direction), 1e-10)
+            X += step[:, None] * direction
+            residual -= step[:, None] * A_direction
+            rs_new = np.einsum('ij,ij->i', residual, residual)
+            direction = residual + (rs_new / np.maximum(rs_old, 1e-10))[:, None] * direction
+            rs_old = rs_new
+
+    def user_index(self, user_code):
+        """Row of user_code in user_factors, or None for unknown users."""
+        if self.user_codes is None:
+            return None
+        pos = int(np.searchsorted(self.user_codes, user_code))
+        if pos < len(self.user_codes) and self.user_codes[pos] == user_code:
+            return pos
+        return None
+
+    def recommend(self, user, n=10, mask=None):
+        """
+        Top-n items for the user row, best first, as (item ids, scores).
+        Items where mask is False are excluded.
+        """
+        scores = self.item_factors @ self.user_factors[user]
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            n = min(n, int(np.count_nonzero(mask)))
+        n = min(n, len(scores))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top, scores[top]
@@ -1,55 +1,52 @@
+import os
+import sys
 import streamlit as st
-import pickle
-import pandas as pd
 
-# Define the CFRecommender class before loading the pickle file
-class CFRecommender:
-    MODEL_NAME = 'Collaborative Filtering'
+# CFRecommender must be importable here to unpickle cf_recommender.pkl
+from recommender import CFRecommender, load_recommender  # noqa: F401
 
-    def __init__(self, cf_predictions_df, items_df):
-        self.cf_predictions_df = cf_predictions_df
-        self.items_df = items_df
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cf_recommender.pkl")
 
-    def get_model_name(self):
-        return self.MODEL_NAME
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from voyage_common.threads import configure_threads
 
-    def recommend_items(self, place, days, budget, topn=5):
-        # Filter available hotels based on place, days, and budget
-        filtered_hotels = self.items_df[
-            (self.items_df["place"] == place) &
-            (self.items_df["days"] == days) &
-            (self.items_df["price"] <= budget)
-        ]
+configure_threads("serving", verbose=False)  # Streamlit re-runs this script on every interaction
 
-        if filtered_hotels.empty:
-            return pd.DataFrame()  # No hotels match criteria
-
-        # Get top recommended hotels sorted by price
-        recommendations_df = filtered_hotels.groupby("name")["price"].min().reset_index()
-        recommendations_df = recommendations_df.sort_values(by="price", ascending=True).head(topn)
-
-        return recommendations_df
-
-
-# Load the trained model
-with open("cf_recommender.pkl", "rb") as f:
-    cf_recommender_model = pickle.load(f)
+# Load the trained model (cached for the whole process, reloaded when the pickle changes)
+cf_recommender_model = load_recommender(MODEL_PATH)
 
 st.title("Hotel Recommendation System 🏨")
 
 # Get list of cities
-city_list = sorted(cf_recommender_model.items_df["place"].unique())
+city_list = cf_recommender_model.get_cities()
 
 # Streamlit UI for input
 selected_city = st.selectbox("Select a City", city_list)
-num_days = st.number_input("Enter Number of Days", min_value=1, max_value=30, step=1)
+stay_mode = st.radio("Stay Length", ["Exact number of days", "Flexible range of days"], horizontal=True)
+if stay_mode == "Exact number of days":
+    num_days = st.number_input("Enter Number of Days", min_value=1, max_value=30, step=1)
+else:
+    # Each hotel's cheapest stay length within the range is recommended
+    min_days, max_days = st.slider("Range of Days", 1, 30, (3, 7))
 budget = st.number_input("Enter Maximum Price per Day", min_value=1.0, max_value=10000.0, step=10.0)
 
 # Number of recommendations
 top_n = st.slider("Number of Hotel Recommendations", 1, 10, 5)
 
+# Optional user code: ranks hotels by the collaborative-filtering model instead of price
+user_code = None
+if stay_mode == "Exact number of days":
+    user_code = st.text_input("User Code (optional, personalises the ranking)", "")
+    user_code = int(user_code) if user_code.strip().isdigit() else None
+
 if st.button("Get Recommendations"):
-    recommendations = cf_recommender_model.recommend_items(selected_city, num_days, budget, topn=top_n)
+    if stay_mode == "Exact number of days":
+        recommendations = cf_recommender_model.recommend_items(selected_city, num_days, budget, topn=top_n,
+                                                               user_code=user_code)
+    else:
+        recommendations = cf_recommender_model.recommend_stays(selected_city, min_days, max_days, budget,
+                                                               topn=top_n)
 
     if recommendations.empty:
         st.error("No hotels available for the selected city, number of days, or budget. Please adjust your filters.")
@@ -57,4 +54,20 @@ if st.button("Get Recommendations"):
         st.subheader("Recommended Hotels:")
         st.dataframe(recommendations)
 
+# Hotels like a given one, from the similarity index built with the model
+hotel_list = cf_recommender_model.get_hotels(selected_city)
+if hotel_list:
+    st.subheader("Find Similar Hotels")
+    selected_hotel = st.selectbox("Select a Hotel", hotel_list)
+    same_city_only = st.checkbox("Only hotels in the same city", value=False)
+    approximate = st.checkbox("Fast approximate search (for large catalogues)", value=False)
+
+    if st.button("Find Similar Hotels"):
+        similar_hotels = cf_recommender_model.similar_items(selected_hotel, topn=top_n, approximate=approximate,
+                                                            same_place=same_city_only)
+        if similar_hotels.empty:
+            st.error("No similar hotels found.")
+        else:
+            st.dataframe(similar_hotels)
+
 st.write("Made with ❤️ using Streamlit")
@@ -0,0 +1,83 @@
+"""
+Benchmark ImplicitALS training time and per-user scoring latency on synthetic bookings.
+
+Usage:
+    python benchmark_als.py --interactions 1000000 --users 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from als import ImplicitALS
+from recommender import CFRecommender
+from update_hotel_data import generate_bookings, generate_catalogue
+
+
+def report(label, latencies_ms):
+    print(f"   {label:<28} mean {latencies_ms.mean():8.3f} ms   "
+          f"p50 {np.percentile(latencies_ms, 50):8.3f} ms   "
+          f"p99 {np.percentile(latencies_ms, 99):8.3f} ms")
+
+
+def time_calls(fn, args_list):
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interactions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--city-scale", type=float, default=8, help="64 cities by default")
+    parser.add_argument("--hotel-scale", type=float, default=5, help="50 hotels per city by default")
+    parser.add_argument("--factors", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    print("📊 Generating catalogue and bookings...")
+    items_df = generate_catalogue(city_scale=args.city_scale, hotel_scale=args.hotel_scale)
+    bookings_df = generate_bookings(items_df, n_bookings=args.interactions, n_users=args.users)
+    print(f"   {len(items_df):,} catalogue rows, {len(bookings_df):,} bookings, "
+          f"{bookings_df['userCode'].nunique():,} users, {bookings_df['name'].nunique():,} hotels")
+
+    print(f"\n🧠 Training ({args.factors} factors, {args.iterations} iterations)...")
+    cf_model = ImplicitALS(factors=args.factors, iterations=args.iterations).fit_bookings(bookings_df)
+    print(f"   Fit time: {cf_model.fit_seconds:.2f} s "
+          f"({cf_model.fit_seconds / args.iterations * 1000:.0f} ms per iteration)")
+
+    model = CFRecommender(pd.DataFrame(), items_df, cf_model=cf_model)
+    rng = np.random.default_rng(0)
+    users = rng.integers(len(cf_model.user_codes), size=args.queries)
+    cities = model.get_cities()
+
+    print(f"\n⏱️  Per-user scoring latency over {args.queries} users:")
+    report("factors only, top-10", time_calls(lambda u: cf_model.recommend(u, 10), [(u,) for u in users]))
+    queries = [
+        (cities[rng.integers(len(cities))], int(rng.integers(1, 31)), 400.0, 5, cf_model.user_codes[u])
+        for u in users
+    ]
+    report("recommend_items, filtered", time_calls(
+        lambda place, days, budget, topn, user_code: model.recommend_items(
+            place, days, budget, topn=topn, user_code=user_code), queries))
+    report("recommend_items, price only", time_calls(
+        lambda place, days, budget, topn, _: model.recommend_items(place, days, budget, topn=topn), queries))
+
+    # Sanity check: users should mostly be recommended hotels in their most-booked city
+    hotel_place = dict(zip(bookings_df["name"], bookings_df["place"]))
+    home = bookings_df.groupby("userCode")["place"].agg(lambda places: places.mode().iloc[0])
+    hits = []
+    for u in users[:200]:
+        top, _ = cf_model.recommend(u, 10)
+        hits.append(np.mean([hotel_place[name] == home[cf_model.user_codes[u]] for name in cf_model.item_names[top]]))
+    print(f"\n   Top-10 hotels in the user's home city: {np.mean(hits):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark how long a price change takes to reach serving: appending to the
+delta log and applying it in load_recommender vs re-pickling and reloading
+the whole model.
+
+Usage:
+    python benchmark_delta.py --rows 3000000 --updates 1000
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalogue_delta import DeltaLog, compact, delta_log_path
+from recommender import CFRecommender, load_recommender
+from update_hotel_data import generate_catalogue
+
+
+def index_entries(model):
+    """{(place, days): {(name, price), ...}}, ignoring the order of equally priced hotels."""
+    return {key: set(zip(names.astype(str).tolist(), prices.tolist())) for key, (names, prices) in model._index.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--updates", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"📊 Building synthetic catalogue (~{args.rows:,} rows)...")
+    items_df = generate_catalogue(city_scale=args.rows / (8 * 100 * 30), hotel_scale=10)
+    model = CFRecommender(pd.DataFrame(), items_df)
+    print(f"   {len(items_df):,} rows")
+
+    rng = np.random.default_rng(0)
+    picked = items_df.iloc[rng.integers(len(items_df), size=args.updates)]
+    updates = [{"op": "upsert", "name": name, "place": place, "days": int(days), "price": 1.0}
+               for name, place, days in zip(picked["name"], picked["place"], picked["days"])]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "cf_recommender.pkl")
+        with open(model_path, "wb") as f:
+            pickle.dump(model, f)
+        serving = load_recommender(model_path)
+        log = DeltaLog(delta_log_path(model_path))
+
+        print(f"\n⏱️  Time until {args.updates:,} price updates are served:")
+        start = time.perf_counter()
+        log.append(updates)
+        appended = time.perf_counter() - start
+        assert load_recommender(model_path) is serving
+        applied = time.perf_counter() - start
+        print(f"   delta log     append {appended:.3f} s, visible after {applied:.3f} s")
+
+        first = updates[0]
+        top = serving.recommend_items(first["place"], first["days"], 1.0, topn=args.updates)
+        assert first["name"] in set(top["name"])
+
+        start = time.perf_counter()
+        compact(model_path)
+        print(f"   compaction    {time.perf_counter() - start:.3f} s (offline)")
+
+        # Serving and compaction must agree when an upsert moves a hotel to another place
+        cities = items_df["place"].cat.categories
+        moved_to = next(city for city in cities if city != first["place"])
+        log.append([{"op": "upsert", "name": first["name"], "place": moved_to, "days": first["days"], "price": 2.0}])
+        live = index_entries(load_recommender(model_path))
+        compact(model_path)
+        assert index_entries(load_recommender(model_path)) == live, "applied deltas and compaction disagree"
+        print("   moved hotel   served index matches the compacted snapshot")
+
+        start = time.perf_counter()
+        with open(model_path, "wb") as f:
+            pickle.dump(CFRecommender(pd.DataFrame(), model.items_df), f)
+        with open(model_path, "rb") as f:
+            pickle.load(f)
+        print(f"   full rebuild  re-pickle and reload {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark CFRecommender.recommend_items: full-table scan vs the (place, days) index,
+and recommend_stays (flexible stay length): per-day index merge vs the sparse table.
+
+Usage:
+    python benchmark_recommender.py --rows 5000000 --queries 200
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from recommender import CFRecommender
+from update_hotel_data import generate_catalogue
+
+
+def recommend_items_scan(items_df, place, days, budget, topn=5):
+    """The original per-query implementation: three masks, groupby, sort."""
+    filtered_hotels = items_df[
+        (items_df["place"] == place) &
+        (items_df["days"] == days) &
+        (items_df["price"] <= budget)
+    ]
+
+    if filtered_hotels.empty:
+        return pd.DataFrame()
+
+    recommendations_df = filtered_hotels.groupby("name", observed=True)["price"].min().reset_index()
+    return recommendations_df.sort_values(by="price", ascending=True).head(topn)
+
+
+def recommend_stays_merge(model, place, min_days, max_days, budget, topn=5):
+    """Range query without the sparse table: merge the index entries of every stay length in the window."""
+    frames = []
+    for days in range(min_days, max_days + 1):
+        entry = model._index.get((place, days))
+        if entry is not None:
+            frames.append(pd.DataFrame({"name": entry[0].astype(str), "days": days, "price": entry[1]}))
+    if not frames:
+        return pd.DataFrame()
+    stays = pd.concat(frames, ignore_index=True)
+    stays = stays[stays["price"] <= budget].sort_values(["price", "days"], kind="mergesort")
+    stays = stays.drop_duplicates("name").sort_values(["price", "name"], kind="mergesort")
+    return stays.head(topn).reset_index(drop=True)
+
+
+def time_queries(fn, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(*query)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def report(label, latencies_ms):
+    print(f"   {label:<8} mean {latencies_ms.mean():9.3f} ms   "
+          f"p50 {np.percentile(latencies_ms, 50):9.3f} ms   "
+          f"p99 {np.percentile(latencies_ms, 99):9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"📊 Building synthetic catalogue (~{args.rows:,} rows)...")
+    # 100 hotels per city and 30 stay lengths; add cities until the row count is reached
+    items_df = generate_catalogue(city_scale=args.rows / (8 * 100 * 30), hotel_scale=10)
+    print(f"   {len(items_df):,} rows, {items_df['place'].nunique()} cities, {items_df['name'].nunique()} hotels")
+
+    start = time.perf_counter()
+    model = CFRecommender(pd.DataFrame(), items_df)
+    print(f"   Index build: {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(args.seed)
+    cities = items_df["place"].cat.categories
+    queries = [
+        (cities[rng.integers(len(cities))], int(rng.integers(1, 31)), float(rng.uniform(50, 150)), 5)
+        for _ in range(args.queries)
+    ]
+
+    # Both paths must agree on the recommended prices
+    for query in queries[:20]:
+        expected = recommend_items_scan(items_df, *query)
+        actual = model.recommend_items(*query)
+        assert len(expected) == len(actual)
+        if len(expected):
+            assert np.allclose(expected["price"].to_numpy(), actual["price"].to_numpy())
+
+    print(f"\n⏱️  Per-query latency over {args.queries} queries:")
+    scan = time_queries(lambda *q: recommend_items_scan(items_df, *q), queries)
+    indexed = time_queries(model.recommend_items, queries)
+    report("scan", scan)
+    report("indexed", indexed)
+    print(f"\n   Speed-up (mean): {scan.mean() / indexed.mean():.0f}x")
+
+    stay_queries = []
+    for place, days, budget, topn in queries:
+        min_days = int(rng.integers(1, 31))
+        stay_queries.append((place, min(days, min_days), max(days, min_days), budget, topn))
+    for query in stay_queries[:20]:
+        expected = recommend_stays_merge(model, *query)
+        actual = model.recommend_stays(*query)
+        assert len(expected) == len(actual)
+        if len(expected):
+            assert np.allclose(expected["price"].to_numpy(), actual["price"].to_numpy())
+
+    print(f"\n⏱️  Flexible stay length, per-query latency over {args.queries} queries:")
+    merged = time_queries(lambda *q: recommend_stays_merge(model, *q), stay_queries)
+    ranged = time_queries(model.recommend_stays, stay_queries)
+    report("merge", merged)
+    report("table", ranged)
+    print(f"\n   Speed-up (mean): {merged.mean() / ranged.mean():.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Load test for the recommendation service: queries per second answered by
+recommend_batch vs a naive per-query recommend_items loop, in process and
+through the HTTP API (one request per query vs batched requests).
+
+Usage:
+    python benchmark_service.py --rows 3000000 --queries 20000 --batch-size 500
+    python benchmark_service.py --url http://localhost:8502 --clients 8
+"""
+import argparse
+import json
+import os
+import pickle
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from recommender import CFRecommender
+from update_hotel_data import generate_catalogue
+
+
+def make_queries(cities, n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"place": str(cities[rng.integers(len(cities))]), "days": int(rng.integers(1, 31)),
+         "budget": float(rng.uniform(50, 150)), "topn": int(rng.integers(1, 11))}
+        for _ in range(n)
+    ]
+
+
+def report(label, n_queries, seconds):
+    print(f"   {label:<34} {n_queries / seconds:12,.0f} queries/s   ({seconds:6.2f} s)")
+
+
+def run_in_process(model, queries, batch_size):
+    tuples = [(q["place"], q["days"], q["budget"], q["topn"]) for q in queries]
+
+    # Both paths must return the same hotels
+    for query, records in zip(tuples[:200], model.recommend_batch(tuples[:200])):
+        expected = model.recommend_items(*query)
+        assert [r["name"] for r in records] == (expected["name"].tolist() if len(expected) else [])
+
+    start = time.perf_counter()
+    for query in tuples:
+        model.recommend_items(*query).to_dict(orient="records")
+    report("recommend_items loop", len(tuples), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(tuples), batch_size):
+        model.recommend_batch(tuples[i:i + batch_size])
+    report(f"recommend_batch ({batch_size}/batch)", len(tuples), time.perf_counter() - start)
+
+
+def make_poster(url):
+    if url is None:
+        from service import app  # Imported late so RECOMMENDER_MODEL_PATH is already set
+        client = app.test_client()
+
+        def post(body):
+            response = client.post("/recommend", json=body)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            return response.get_json()
+        return post
+
+    def post(body):
+        request = urllib.request.Request(url.rstrip("/") + "/recommend", data=json.dumps(body).encode(),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    return post
+
+
+def run_http(post, queries, batch_size, clients):
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        start = time.perf_counter()
+        list(pool.map(post, queries))
+        report(f"HTTP, 1 query/request, {clients} client(s)", len(queries), time.perf_counter() - start)
+
+        batches = [{"queries": queries[i:i + batch_size]} for i in range(0, len(queries), batch_size)]
+        start = time.perf_counter()
+        list(pool.map(post, batches))
+        report(f"HTTP, {batch_size} queries/request", len(queries), time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--http-queries", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--url", help="Load test a running service instead of an in-process one")
+    args = parser.parse_args()
+
+    if args.url:
+        with urllib.request.urlopen(args.url.rstrip("/") + "/cities") as response:
+            cities = json.load(response)["cities"]
+        run_http(make_poster(args.url), make_queries(cities, args.http_queries), args.batch_size, args.clients)
+        return
+
+    print(f"📊 Building synthetic catalogue (~{args.rows:,} rows)...")
+    items_df = generate_catalogue(city_scale=args.rows / (8 * 100 * 30), hotel_scale=10)
+    model = CFRecommender(pd.DataFrame(), items_df)
+    queries = make_queries(model.get_cities(), args.queries)
+    print(f"   {len(items_df):,} rows, {len(model.get_cities())} cities")
+
+    print(f"\n⏱️  In process, {len(queries):,} queries:")
+    run_in_process(model, queries, args.batch_size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["RECOMMENDER_MODEL_PATH"] = os.path.join(tmp, "cf_recommender.pkl")
+        with open(os.environ["RECOMMENDER_MODEL_PATH"], "wb") as f:
+            pickle.dump(model, f)
+        print(f"\n🌐 Through the Flask API, {args.http_queries:,} queries:")
+        run_http(make_poster(None), queries[:args.http_queries], args.batch_size, args.clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Append-only delta log of hotel price changes for the recommender.
+
+Instead of regenerating the catalogue and re-pickling the whole model for a
+price change, writers append JSON lines to cf_recommender.delta.jsonl:
+
+    {"seq": 12, "op": "upsert", "name": "Louvre Palace", "place": "Paris", "days": 3, "price": 129.0, "ts": ...}
+    {"seq": 13, "op": "delete", "name": "Louvre Palace", "days": 3, "ts": ...}
+
+An upsert sets a hotel's price for one stay length (adding the hotel or stay
+if it is new, and moving that stay when the place differs); a delete removes one stay, or the whole hotel when days is
+omitted. Sequence numbers only ever grow. load_recommender() (recommender.py)
+reads the new lines on every call and applies them to the in-memory query
+index, so updates reach serving without reloading the pickle.
+
+Compaction folds the deltas into items_df, writes a new base snapshot whose
+delta_seq records the last folded record, and rewrites the log to start with
+a checkpoint record carrying that seq followed by anything appended since.
+
+    python catalogue_delta.py upsert "Louvre Palace" Paris 3 129.0
+    python catalogue_delta.py delete "Louvre Palace" --days 3
+    python catalogue_delta.py import price_updates.csv     # name,place,days,price
+    python catalogue_delta.py compact
+    python catalogue_delta.py status
+"""
+import argparse
+import fcntl
+import json
+import os
+import pickle
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from recommender import CFRecommender
+from similarity import SimilarityIndex
+
+UPSERT = "upsert"
+DELETE = "delete"
+CHECKPOINT = "checkpoint"
+
+
+def delta_log_path(model_path):
+    """cf_recommender.pkl -> cf_recommender.delta.jsonl"""
+    return os.path.splitext(model_path)[0] + ".delta.jsonl"
+
+
+def _parse_lines(data):
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+
+class DeltaLog:
+    """Writer side: appends and rewrites are serialised with a lock file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def _locked(self):
+        # A separate lock file, because compaction replaces the log itself
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def last_seq(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                tail = f.read()
+        except FileNotFoundError:
+            return 0
+        lines = [line for line in tail.splitlines() if line.strip()]
+        if len(lines) > 1 or (lines and len(tail) < 4096):
+            return json.loads(lines[-1])["seq"]
+        return max((record["seq"] for record in self.read()), default=0)  # Single huge line
+
+    def append(self, records):
+        """Append records (dicts without seq) and return the last seq assigned."""
+        with self._locked():
+            seq = self.last_seq()
+            lines = []
+            for record in records:
+                seq += 1
+                lines.append(json.dumps({"seq": seq, **record, "ts": time.time()}) + "\n")
+            with open(self.path, "a") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        return seq
+
+    def upsert(self, name, place, days, price):
+        return self.append([{"op": UPSERT, "name": name, "place": place, "days": int(days), "price": float(price)}])
+
+    def delete(self, name, days=None):
+        return self.append([{"op": DELETE, "name": name, "days": None if days is None else int(days)}])
+
+    def read(self):
+        try:
+            with open(self.path) as f:
+                return _parse_lines(f.read())
+        except FileNotFoundError:
+            return []
+
+    def truncate_through(self, seq):
+        """Drop every record up to seq (folded into a snapshot), keeping later appends."""
+        with self._locked():
+            remaining = [record for record in self.read() if record["seq"] > seq]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps({"seq": seq, "op": CHECKPOINT, "ts": time.time()}) + "\n")
+                f.writelines(json.dumps(record) + "\n" for record in remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+class DeltaLogReader:
+    """
+    Serving side: returns the records appended since the previous call by
+    remembering the byte offset, and starts over when compaction has replaced
+    the file. Only complete lines are consumed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._inode = None
+        self._offset = 0
+
+    def read_new(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self._inode, self._offset = stat.st_ino, 0
+            if stat.st_size == self._offset:
+                return []
+            f.seek(self._offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1  # A writer may be mid-line
+        self._offset += complete
+        return _parse_lines(data[:complete].decode())
+
+
+def fold_deltas(items_df, records):
+    """items_df with the upserts and deletes of records applied, in seq order."""
+    pending = {}  # (name, days) -> upsert record or None for a delete
+    deleted_hotels = set()
+    for record in records:
+        if record["op"] == UPSERT:
+            pending[(record["name"], int(record["days"]))] = record
+        elif record["op"] == DELETE and record.get("days") is None:
+            deleted_hotels.add(record["name"])
+            pending = {key: value for key, value in pending.items() if key[0] != record["name"]}
+        elif record["op"] == DELETE:
+            pending[(record["name"], int(record["days"]))] = None
+
+    if not pending and not deleted_hotels:
+        return items_df
+
+    names = items_df["name"].astype(object)
+    keys = pd.MultiIndex.from_arrays([names, items_df["days"].astype(int)])
+    drop = names.isin(deleted_hotels).to_numpy() | keys.isin(list(pending))
+    upserts = pd.DataFrame(
+        [{"name": r["name"], "place": r["place"], "days": r["days"], "price": r["price"]}
+         for r in pending.values() if r is not None],
+        columns=["name", "place", "days", "price"],
+    )
+
+    folded = pd.concat([items_df[~drop].astype({"name": object, "place": object}), upserts], ignore_index=True)
+    return folded.astype({
+        "name": "category",
+        "place": "category",
+        "days": items_df["days"].dtype,
+        "price": items_df["price"].dtype,
+    })
+
+
+def compact(model_path, log_path=None, catalogue_path=None):
+    """
+    Fold the delta log into a new cf_recommender.pkl snapshot and return the
+    number of records folded. Appends that race with compaction are kept.
+    """
+    log = DeltaLog(log_path or delta_log_path(model_path))
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+
+    records = [record for record in log.read() if record["seq"] > model.delta_seq and record["op"] != CHECKPOINT]
+    if not records:
+        return 0
+    last_seq = records[-1]["seq"]
+    items_df = fold_deltas(model.items_df, records)
+
+    similarity_index = model.similarity_index
+    if similarity_index is not None:
+        similarity_index = SimilarityIndex.from_catalogue(
+            items_df, cf_model=model.cf_model, n_tables=similarity_index.n_tables, seed=similarity_index.seed)
+    snapshot = CFRecommender(model.cf_predictions_df, items_df, cf_model=model.cf_model,
+                             similarity_index=similarity_index, delta_seq=last_seq)
+
+    # Snapshot first: a reader that sees the rewritten log also finds the new pickle
+    tmp_path = model_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f)
+    os.replace(tmp_path, model_path)
+    if catalogue_path:
+        items_df.to_parquet(catalogue_path, index=False)
+    log.truncate_through(last_seq)
+    return len(records)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Append hotel price changes or compact the delta log")
+    parser.add_argument('--model', default='cf_recommender.pkl')
+    parser.add_argument('--log', help='Delta log path (default: next to the model)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    upsert = commands.add_parser('upsert', help="Set a hotel's price for one stay length")
+    upsert.add_argument('name')
+    upsert.add_argument('place')
+    upsert.add_argument('days', type=int)
+    upsert.add_argument('price', type=float)
+
+    delete = commands.add_parser('delete', help='Remove one stay length, or the whole hotel')
+    delete.add_argument('name')
+    delete.add_argument('--days', type=int)
+
+    bulk = commands.add_parser('import', help='Upsert every row of a name,place,days,price CSV')
+    bulk.add_argument('csv')
+
+    compaction = commands.add_parser('compact', help='Fold the log into a new model snapshot')
+    compaction.add_argument('--catalogue', help='Also rewrite this Parquet catalogue')
+
+    commands.add_parser('status', help='Show the snapshot and log positions')
+    return parser.parse_args()
+
+
+def main(args):
+    log = DeltaLog(args.log or delta_log_path(args.model))
+
+    if args.command == 'upsert':
+        print(f"✓ seq {log.upsert(args.name, args.place, args.days, args.price)}")
+    elif args.command == 'delete':
+        print(f"✓ seq {log.delete(args.name, args.days)}")
+    elif args.command == 'import':
+        updates = pd.read_csv(args.csv, usecols=['name', 'place', 'days', 'price'])
+        seq = log.append([{"op": UPSERT, "name": row.name, "place": row.place, "days": int(row.days),
+                           "price": float(row.price)} for row in updates.itertuples(index=False)])
+        print(f"✓ {len(updates):,} upserts appended, last seq {seq}")
+    elif args.command == 'compact':
+        start = time.perf_counter()
+        folded = compact(args.model, log.path, args.catalogue)
+        print(f"✓ Folded {folded:,} deltas into {args.model} in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'status':
+        with open(args.model, "rb") as f:
+            delta_seq = pickle.load(f).delta_seq
+        records = [record for record in log.read() if record["op"] != CHECKPOINT]
+        last_seq = records[-1]["seq"] if records else delta_seq
+        print(f"Snapshot at seq {delta_seq}, log at seq {last_seq}: "
+              f"{sum(record['seq'] > delta_seq for record in records):,} deltas pending compaction")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,397 @@
+"""
+Hotel recommender shared by the Streamlit app and the model build scripts.
+
+The pickled cf_recommender.pkl holds a CFRecommender instance. A query index
+keyed by (place, days) is built whenever the model is created or unpickled,
+so recommend_items is a binary search plus a slice instead of a scan of
+items_df.
+
+When a trained ImplicitALS model (als.py) is attached as cf_model, passing a
+user_code to recommend_items ranks the hotels that pass the place, days and
+budget filters by the user's collaborative-filtering score instead of price.
+
+recommend_batch answers many queries at once for the HTTP service
+(service.py), sharing the index lookup between queries on the same
+(place, days).
+
+recommend_stays answers flexible stay lengths ("3 to 7 days under budget"):
+a StayRangeTable per place, built with the index, gives every hotel's
+cheapest stay in any [min_days, max_days] window in O(1).
+
+A SimilarityIndex (similarity.py) attached as similarity_index answers
+"hotels like this one" through similar_items.
+
+load_recommender() keeps one unpickled model per process and only re-reads the
+pickle when its contents change, so Streamlit reruns do not reload it. Price
+changes appended to the delta log (catalogue_delta.py) are applied to the
+cached model's index on the next call, without reloading the pickle.
+"""
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class StayRangeTable:
+    """
+    Range-minimum structure over the stay lengths of one place: a sparse
+    table whose level k holds, for every hotel and starting stay length, the
+    cheapest price over the next 2**k stay lengths and the column where it
+    is reached. Any window is covered by two overlapping blocks of one
+    level, so a query is two column reads per hotel.
+    """
+
+    def __init__(self, names, days, prices):
+        # prices: hotels x stay lengths, inf where the hotel has no such stay
+        self.names = names
+        self.days = days
+        columns = np.arange(len(days), dtype=np.int32)
+        self.mins = [prices]
+        self.argmins = [np.broadcast_to(columns, prices.shape)]
+        width = 1
+        while 2 * width <= len(days):
+            mins, argmins = self.mins[-1], self.argmins[-1]
+            count = len(days) - 2 * width + 1
+            left, right = mins[:, :count], mins[:, width:width + count]
+            take_right = right < left  # Ties keep the shorter stay
+            self.mins.append(np.where(take_right, right, left))
+            self.argmins.append(np.where(take_right, argmins[:, width:width + count], argmins[:, :count]))
+            width *= 2
+
+    @classmethod
+    def from_index(cls, entries):
+        """Build from the {days: (names, prices)} index entries of one place."""
+        days = np.array(sorted(entries), dtype=np.int64)
+        hotels, names = pd.factorize(np.concatenate([entries[d][0] for d in days]), sort=True)
+        columns = np.repeat(np.arange(len(days)), [len(entries[d][0]) for d in days])
+        prices = np.full((len(names), len(days)), np.inf)
+        prices[hotels, columns] = np.concatenate([entries[d][1] for d in days])
+        return cls(np.asarray(names, dtype=object), days, prices)
+
+    def cheapest(self, min_days, max_days):
+        """Per hotel, the cheapest price and its stay length in [min_days, max_days]; None if no stay fits."""
+        lo = int(np.searchsorted(self.days, min_days, side="left"))
+        hi = int(np.searchsorted(self.days, max_days, side="right")) - 1
+        if lo > hi:
+            return None
+        level = (hi - lo + 1).bit_length() - 1
+        mins, argmins = self.mins[level], self.argmins[level]
+        right = hi - (1 << level) + 1
+        take_right = mins[:, right] < mins[:, lo]
+        prices = np.where(take_right, mins[:, right], mins[:, lo])
+        columns = np.where(take_right, argmins[:, right], argmins[:, lo])
+        return prices, self.days[columns]
+
+
+class CFRecommender:
+    MODEL_NAME = 'Collaborative Filtering'
+
+    # Attributes derived from items_df; rebuilt on load instead of pickled
+    _DERIVED = ('_index', '_stay_tables', '_cities', '_cf_items', '_hotel_places', 'applied_seq')
+
+    def __init__(self, cf_predictions_df, items_df, cf_model=None, similarity_index=None, delta_seq=0):
+        self.cf_predictions_df = cf_predictions_df
+        self.items_df = items_df
+        self.cf_model = cf_model
+        self.similarity_index = similarity_index
+        # Last delta log record already folded into items_df
+        self.delta_seq = delta_seq
+        self.build_index()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._DERIVED:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        # Pickles from before the ALS engine, similarity index and delta log
+        state.setdefault('cf_model', None)
+        state.setdefault('similarity_index', None)
+        state.setdefault('delta_seq', 0)
+        self.__dict__.update(state)
+        self.build_index()
+
+    def get_model_name(self):
+        return self.MODEL_NAME
+
+    def build_index(self):
+        """
+        Build {(place, days): (names, prices)} where prices holds each hotel's
+        minimum price for that stay, sorted ascending (ties broken by name),
+        and a StayRangeTable per place for recommend_stays.
+        """
+        self._index = {}
+        self._stay_tables = {}
+        self._cities = None
+        self._cf_items = None
+        self._hotel_places = None
+        # Last delta log record reflected in _index
+        self.applied_seq = self.delta_seq
+        if self.cf_model is not None:
+            # Hotel name -> column of cf_model.item_factors
+            self._cf_items = pd.Index(self.cf_model.item_names)
+        if self.items_df.empty:
+            return
+
+        min_prices = (
+            self.items_df.groupby(["place", "days", "name"], observed=True, sort=False)["price"]
+            .min()
+            .reset_index()
+            .sort_values(["place", "days", "price", "name"], kind="mergesort", ignore_index=True)
+        )
+        names = min_prices["name"].to_numpy(dtype=object)
+        prices = min_prices["price"].to_numpy(dtype=np.float64)
+
+        # After the sort every (place, days) group is a contiguous run of rows
+        for (place, days), rows in min_prices.groupby(["place", "days"], observed=True, sort=False).indices.items():
+            start, stop = rows[0], rows[-1] + 1
+            self._index[(place, int(days))] = (names[start:stop], prices[start:stop])
+        self._build_stay_tables({place for place, _ in self._index})
+
+    def _build_stay_tables(self, places):
+        entries = {place: {} for place in places}
+        for (place, days), entry in self._index.items():
+            if place in entries:
+                entries[place][days] = entry
+        for place, by_days in entries.items():
+            if by_days:
+                self._stay_tables[place] = StayRangeTable.from_index(by_days)
+            else:
+                self._stay_tables.pop(place, None)
+
+    def get_cities(self):
+        """Sorted list of places in the catalogue."""
+        if self._cities is None:
+            self._cities = sorted({place for place, _ in self._index})
+        return self._cities
+
+    def apply_deltas(self, records):
+        """
+        Apply delta log records (see catalogue_delta.py) to the query index.
+        Records at or below applied_seq are skipped. Each (place, days) entry
+        they touch is rebuilt once and swapped in, so concurrent readers see
+        either the old or the new entry; items_df is left for compaction.
+        """
+        if not records:
+            return
+        if self._hotel_places is None:
+            # Hotel name -> places it is listed in (normally just one)
+            self._hotel_places = {}
+            pairs = self.items_df[["name", "place"]].drop_duplicates()
+            for name, place in zip(pairs["name"], pairs["place"]):
+                self._hotel_places.setdefault(name, set()).add(place)
+        changes = {}  # (place, days) -> {name: new price, or None to remove}
+
+        for record in records:
+            if record["seq"] <= self.applied_seq or record["op"] == "checkpoint":
+                continue
+            self.applied_seq = record["seq"]
+            name = record["name"]
+            if record["op"] == "upsert":
+                places = self._hotel_places.setdefault(name, set())
+                # Like compaction, an upsert replaces the hotel's stay of that length wherever it was listed
+                for place in places - {record["place"]}:
+                    changes.setdefault((place, int(record["days"])), {})[name] = None
+                places.add(record["place"])
+                changes.setdefault((record["place"], int(record["days"])), {})[name] = float(record["price"])
+                continue
+
+            places = self._hotel_places.get(name, ())
+            if record.get("days") is not None:
+                keys = [(place, int(record["days"])) for place in places]
+            else:
+                keys = [key for key in set(self._index) | set(changes) if key[0] in places]
+            for key in keys:
+                changes.setdefault(key, {})[name] = None
+
+        for key, updates in changes.items():
+            names, prices = self._index.get(key, (np.empty(0, dtype=object), np.empty(0)))
+            added = [(name, price) for name, price in updates.items() if price is not None]
+            keep = ~np.isin(names, list(updates))
+            names = np.concatenate([names[keep], np.array([name for name, _ in added], dtype=object)])
+            prices = np.concatenate([prices[keep], np.array([price for _, price in added], dtype=np.float64)])
+            if len(names):
+                order = np.lexsort((names.astype(str), prices))  # Cheapest first, ties by name
+                self._index[key] = (names[order], prices[order])
+            else:
+                self._index.pop(key, None)
+        if changes:
+            self._cities = None
+            self._build_stay_tables({place for place, _ in changes})
+
+    def recommend_items(self, place, days, budget, topn=5, user_code=None):
+        # Hotels for this place and stay length, cheapest first
+        entry = self._index.get((place, int(days)))
+        if entry is None:
+            return pd.DataFrame()  # No hotels match criteria
+
+        names, prices = entry
+        within_budget = int(np.searchsorted(prices, budget, side="right"))
+        if within_budget <= 0 or topn <= 0:
+            return pd.DataFrame()  # No hotels within budget
+
+        user = self.cf_model.user_index(user_code) if (user_code is not None and self.cf_model) else None
+        if user is not None:
+            return self._recommend_for_user(user, names[:within_budget], prices[:within_budget], topn)
+
+        count = min(within_budget, topn)
+        return pd.DataFrame({"name": names[:count], "price": prices[:count]})
+
+    def recommend_stays(self, place, min_days, max_days, budget, topn=5):
+        """
+        Flexible stay length: each hotel's cheapest stay of min_days to
+        max_days days, keeping those within budget, cheapest first (ties by
+        name). Returns name, days and price columns.
+        """
+        table = self._stay_tables.get(place)
+        if table is None or topn <= 0:
+            return pd.DataFrame()  # No hotels match criteria
+
+        cheapest = table.cheapest(min_days, max_days)
+        if cheapest is None:
+            return pd.DataFrame()  # No stay length in the window
+        prices, days = cheapest
+        within_budget = np.flatnonzero(prices <= budget)
+        if len(within_budget) == 0:
+            return pd.DataFrame()  # No hotels within budget
+
+        # Hotels are sorted by name, so a stable sort on price breaks ties by name
+        if len(within_budget) > topn:
+            cutoff = np.partition(prices[within_budget], topn - 1)[topn - 1]
+            within_budget = within_budget[prices[within_budget] <= cutoff]
+        order = within_budget[np.argsort(prices[within_budget], kind="stable")][:topn]
+        return pd.DataFrame({"name": table.names[order], "days": days[order], "price": prices[order]})
+
+    def recommend_batch(self, queries):
+        """
+        Answer many (place, days, budget, topn) queries in one pass, returning
+        one list of {"name", "price"} records per query, in query order.
+
+        Queries are grouped by (place, days) so every group costs one index
+        lookup and one vectorized searchsorted over all of its budgets; the
+        records are cut from a single list conversion of the group's cheapest
+        hotels.
+        """
+        results = [[] for _ in queries]
+        if not results:
+            return results
+
+        budgets = np.array([query[2] for query in queries], dtype=np.float64)
+        topns = np.array([query[3] for query in queries], dtype=np.int64)
+        groups = {}
+        for i, (place, days, _, _) in enumerate(queries):
+            groups.setdefault((place, int(days)), []).append(i)
+
+        for key, rows in groups.items():
+            entry = self._index.get(key)
+            if entry is None:
+                continue  # No hotels match criteria
+            names, prices = entry
+            rows = np.array(rows)
+            counts = np.minimum(np.searchsorted(prices, budgets[rows], side="right"), np.maximum(topns[rows], 0))
+            longest = int(counts.max())
+            if longest == 0:
+                continue
+            records = [{"name": name, "price": price}
+                       for name, price in zip(names[:longest].tolist(), prices[:longest].tolist())]
+            for row, count in zip(rows.tolist(), counts.tolist()):
+                results[row] = records[:count]
+        return results
+
+    def get_hotels(self, place):
+        """Hotel names in place, for picking a hotel to find similar ones."""
+        if self.similarity_index is None:
+            return []
+        index = self.similarity_index
+        return sorted(index.names[index.places == place])
+
+    def similar_items(self, name, topn=5, approximate=False, same_place=False):
+        """Hotels most similar to name; approximate=True uses the LSH buckets."""
+        if self.similarity_index is None:
+            return pd.DataFrame()
+        return self.similarity_index.similar(name, topn=topn, approximate=approximate, same_place=same_place)
+
+    def _recommend_for_user(self, user, names, prices, topn):
+        # The place/days/budget filters become a mask over the factor model's hotels
+        item_ids = self._cf_items.get_indexer(names)
+        known = item_ids >= 0
+        mask = np.zeros(len(self._cf_items), dtype=bool)
+        mask[item_ids[known]] = True
+
+        top, scores = self.cf_model.recommend(user, topn, mask=mask)
+        price_by_item = dict(zip(item_ids[known], prices[known]))
+        recommendations_df = pd.DataFrame({
+            "name": self.cf_model.item_names[top],
+            "price": [price_by_item[item] for item in top],
+            "score": np.round(scores.astype(np.float64), 4),
+        })
+
+        # Hotels nobody has booked yet fill any remaining slots, cheapest first
+        if len(recommendations_df) < topn:
+            unseen = pd.DataFrame({"name": names[~known], "price": prices[~known]})
+            recommendations_df = pd.concat(
+                [recommendations_df, unseen.head(topn - len(recommendations_df))], ignore_index=True)
+        return recommendations_df
+
+
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+
+
+def _file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_snapshot(path, delta_log):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _model_cache.get(path)
+    if cached is not None and cached["signature"] == signature:
+        return cached
+
+    digest = _file_digest(path)
+    if cached is not None and cached["digest"] == digest:
+        # Touched or rewritten with identical contents
+        cached["signature"] = signature
+        return cached
+
+    from catalogue_delta import DeltaLogReader
+    with open(path, "rb") as f:
+        model = pickle.load(f)
+    cached = {"signature": signature, "digest": digest, "model": model, "deltas": DeltaLogReader(delta_log)}
+    _model_cache[path] = cached
+    return cached
+
+
+def load_recommender(path="cf_recommender.pkl", delta_log=None):
+    """
+    Return the CFRecommender pickled at path, shared by every caller in the
+    process. Each call costs one stat() of the pickle and one of the delta
+    log: the pickle is hashed when its mtime or size changes and only
+    reloaded when the hash differs, and new delta records are applied to the
+    cached model's index.
+    """
+    path = os.path.abspath(path)
+    if delta_log is None:
+        delta_log = os.path.splitext(path)[0] + ".delta.jsonl"
+
+    with _model_cache_lock:
+        cached = _load_snapshot(path, delta_log)
+        records = cached["deltas"].read_new()
+        model = cached["model"]
+        if any(r["op"] == "checkpoint" and r["seq"] > model.applied_seq for r in records):
+            # The log was compacted past what this model has seen: reload the new snapshot
+            _model_cache.pop(path)
+            cached = _load_snapshot(path, delta_log)
+            records = cached["deltas"].read_new()
+            model = cached["model"]
+        model.apply_deltas(records)
+        return model
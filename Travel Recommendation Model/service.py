@@ -0,0 +1,118 @@
+"""
+HTTP API for the hotel recommender.
+
+Loads cf_recommender.pkl once per process (through load_recommender, so a
+rebuilt pickle is picked up without a restart) and answers batches of
+queries in one pass over the (place, days) index.
+
+    POST /recommend
+    {"queries": [{"place": "Paris", "days": 3, "budget": 200, "topn": 5}, ...]}
+
+returns {"results": [[{"name": ..., "price": ...}, ...], ...]}, one list per
+query in request order. A single query object is accepted as well. Queries
+with a user_code are ranked by the collaborative-filtering model.
+
+Run with:
+    python service.py            # http://localhost:8502
+"""
+import math
+import os
+import sys
+
+from flask import Flask, request, jsonify
+
+# CFRecommender must be importable here to unpickle cf_recommender.pkl
+from recommender import CFRecommender, load_recommender  # noqa: F401
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.environ.get("RECOMMENDER_MODEL_PATH", os.path.join(BASE_DIR, "cf_recommender.pkl"))
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(BASE_DIR))
+from voyage_common.threads import configure_threads
+
+# Batched scoring is BLAS-bound; each worker process gets its share of the CPUs
+configure_threads("serving")
+MAX_BATCH_SIZE = int(os.environ.get("RECOMMENDER_MAX_BATCH", "1000"))
+DEFAULT_TOPN = 5
+
+app = Flask(__name__)
+
+
+def get_model():
+    # One stat() per call; the unpickled model is shared by every request
+    return load_recommender(MODEL_PATH)
+
+
+def parse_query(raw):
+    """(place, days, budget, topn, user_code) from a query object; ValueError if malformed."""
+    if not isinstance(raw, dict):
+        raise ValueError("each query must be an object")
+    missing = [field for field in ("place", "days", "budget") if field not in raw]
+    if missing:
+        raise ValueError(f"missing field(s): {', '.join(missing)}")
+    try:
+        days = int(raw["days"])
+        budget = float(raw["budget"])
+        topn = int(raw.get("topn", DEFAULT_TOPN))
+    except (TypeError, ValueError):
+        raise ValueError("days and topn must be integers and budget a number")
+    # JSON allows NaN and Infinity: NaN would match nothing and Infinity skip the budget filter
+    if not math.isfinite(budget):
+        raise ValueError("budget must be a finite number")
+    if days <= 0 or topn <= 0:
+        raise ValueError("days and topn must be positive")
+    user_code = raw.get("user_code")
+    # User codes are matched as integers; a string or other type would silently match nobody
+    if user_code is not None and (isinstance(user_code, bool) or not isinstance(user_code, int)):
+        raise ValueError("user_code must be an integer")
+    return str(raw["place"]), days, budget, topn, user_code
+
+
+def answer_queries(model, queries):
+    """Records for every query, batching all the price-ranked ones together."""
+    results = [None] * len(queries)
+    batch = [i for i, query in enumerate(queries) if query[4] is None]
+    for i, records in zip(batch, model.recommend_batch([queries[i][:4] for i in batch])):
+        results[i] = records
+    # Personalised queries need a factor product each
+    for i, (place, days, budget, topn, user_code) in enumerate(queries):
+        if results[i] is None:
+            recommendations = model.recommend_items(place, days, budget, topn=topn, user_code=user_code)
+            results[i] = recommendations.to_dict(orient="records")
+    return results
+
+
+@app.route('/healthz')
+def healthz():
+    return jsonify({"status": "ok"}), 200
+
+
+@app.route('/cities')
+def cities():
+    return jsonify({"cities": get_model().get_cities()})
+
+
+@app.route('/recommend', methods=['POST'])
+def recommend():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({"error": "request body must be JSON"}), 400
+
+    raw_queries = payload.get("queries", [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(raw_queries, list):
+        return jsonify({"error": "queries must be a list"}), 400
+    if len(raw_queries) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"at most {MAX_BATCH_SIZE} queries per request"}), 413
+
+    try:
+        queries = [parse_query(raw) for raw in raw_queries]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"results": answer_queries(get_model(), queries)})
+
+
+if __name__ == "__main__":
+    get_model()  # Fail fast if the model has not been built
+    app.run(host="0.0.0.0", port=8502)
@@ -0,0 +1,195 @@
+"""
+Item-to-item "similar hotels" index for the hotel recommender.
+
+Each hotel is described by its price profile across stay lengths, its place
+and, when a collaborative-filtering model is available, its ALS latent
+factors. Every block is L2-normalised and weighted and similarity is the
+cosine of the concatenated vectors. The place block is a one-hot vector, so
+instead of storing thousands of mostly-zero columns its contribution is
+added at query time as a bonus for hotels in the same place; the stored
+vectors are pre-divided by each hotel's full norm and kept as float32.
+
+Exact lookups score hotels against the whole catalogue in blocks of rows and
+keep the top-k with argpartition. For large catalogues an approximate mode
+uses random-projection LSH: hotels are bucketed by the sign pattern of a few
+random hyperplanes in several tables, and only hotels sharing a bucket with
+the query, plus the hotels in the query's place, are scored.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def hotel_features(items_df, cf_model=None, weights=(1.0, 1.0, 1.0)):
+    """
+    Return (names, places, vectors, place_weights), one row per hotel.
+
+    weights scales the (price profile, place, latent factors) blocks. The
+    cosine similarity of hotels i and j is
+        vectors[i] @ vectors[j] + place_weights[i] * place_weights[j] * (places[i] == places[j])
+    """
+    # Price profile: each hotel's minimum price for every stay length,
+    # missing stays filled with the hotel's mean
+    profile = items_df.pivot_table(index="name", columns="days", values="price", aggfunc="min", observed=True)
+    names = profile.index.to_numpy(dtype=object)
+    price_block = profile.to_numpy(dtype=np.float64, copy=True)
+    missing = np.isnan(price_block)
+    price_block[missing] = np.nanmean(price_block, axis=1)[np.nonzero(missing)[0]]
+    # Absolute level and shape across stay lengths both matter
+    level = price_block.mean(axis=1, keepdims=True)
+    price_block = np.hstack([level / max(level.max(), 1e-12), _normalize_rows(price_block - level)])
+    blocks = [weights[0] * _normalize_rows(price_block)]
+
+    if cf_model is not None:
+        factors = np.zeros((len(names), cf_model.item_factors.shape[1]))
+        rows = pd.Index(cf_model.item_names).get_indexer(names)
+        known = rows >= 0
+        factors[known] = cf_model.item_factors[rows[known]]
+        blocks.append(weights[2] * _normalize_rows(factors))
+
+    dense = np.hstack(blocks)
+    # Norm of the full vector, including the (virtual) one-hot place block
+    norms = np.sqrt(np.einsum('ij,ij->i', dense, dense) + weights[1] ** 2)
+    vectors = (dense / norms[:, None]).astype(np.float32)
+    place_weights = (weights[1] / norms).astype(np.float32)
+
+    places = items_df.drop_duplicates("name").set_index("name")["place"].reindex(names)
+    return names, places.to_numpy(dtype=object), np.ascontiguousarray(vectors), place_weights
+
+
+class SimilarityIndex:
+    # Derived from the stored arrays and the seed; rebuilt on load
+    _DERIVED = ('_positions', '_place_codes', '_place_rows', '_place_bounds', '_planes', '_buckets')
+
+    def __init__(self, names, places, vectors, place_weights, n_planes=None, n_tables=16,
+                 bucket_size=128, seed=42):
+        self.names = np.asarray(names, dtype=object)
+        self.places = np.asarray(places, dtype=object)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.place_weights = np.asarray(place_weights, dtype=np.float32)
+        if n_planes is None:
+            # Enough hyperplanes for roughly bucket_size hotels per bucket
+            n_planes = max(1, int(np.log2(max(len(self.names) / bucket_size, 2))))
+        self.n_planes = n_planes
+        self.n_tables = n_tables
+        self.seed = seed
+        self._build_lookups()
+
+    @classmethod
+    def from_catalogue(cls, items_df, cf_model=None, **kwargs):
+        return cls(*hotel_features(items_df, cf_model), **kwargs)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._DERIVED:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _build_lookups(self):
+        self._positions = pd.Index(self.names)
+        self._place_codes = pd.factorize(self.places)[0].astype(np.int32)
+        # Hotel rows grouped by place: rows of place p are _place_rows[bounds[p]:bounds[p + 1]]
+        self._place_rows = np.argsort(self._place_codes, kind="stable")
+        self._place_bounds = np.searchsorted(self._place_codes[self._place_rows],
+                                             np.arange(self._place_codes.max() + 2))
+
+        rng = np.random.default_rng(self.seed)
+        self._planes = rng.standard_normal(
+            (self.vectors.shape[1], self.n_tables * self.n_planes)).astype(np.float32)
+        codes = self._hash(self.vectors)
+        self._buckets = []
+        for table in range(self.n_tables):
+            # Sorted bucket ids and the hotel rows in that order, for searchsorted lookups
+            order = np.argsort(codes[:, table], kind="stable")
+            self._buckets.append((codes[order, table], order))
+
+    def _hash(self, vectors):
+        # One integer bucket id per table from the signs of n_planes projections
+        bits = (vectors @ self._planes) > 0
+        bits = bits.reshape(len(vectors), self.n_tables, self.n_planes)
+        return bits @ (1 << np.arange(self.n_planes, dtype=np.int64))
+
+    def _same_place(self, row):
+        code = self._place_codes[row]
+        return self._place_rows[self._place_bounds[code]:self._place_bounds[code + 1]]
+
+    def _candidates(self, row):
+        codes = self._hash(self.vectors[row][None, :])[0]
+        # Same-place hotels get the place bonus, so they are always candidates
+        found = [self._same_place(row)]
+        for table, (sorted_codes, order) in enumerate(self._buckets):
+            lo = np.searchsorted(sorted_codes, codes[table], side="left")
+            hi = np.searchsorted(sorted_codes, codes[table], side="right")
+            found.append(order[lo:hi])
+        return np.unique(np.concatenate(found))
+
+    def _scores(self, rows, candidates):
+        """Cosine similarity of hotels rows (queries) against hotels candidates."""
+        scores = self.vectors[rows] @ self.vectors[candidates].T
+        same_place = self._place_codes[rows][:, None] == self._place_codes[candidates][None, :]
+        scores += same_place * np.outer(self.place_weights[rows], self.place_weights[candidates])
+        return scores
+
+    def query(self, rows, k=5, block_size=65536):
+        """
+        Exact top-k neighbours of the hotels at rows (the hotel itself
+        included): the catalogue is scored block by block with a matrix
+        product, so memory stays at len(rows) x block_size.
+        Returns (neighbour rows, scores), each shaped (len(rows), k).
+        """
+        rows = np.atleast_1d(rows)
+        k = min(k, len(self))
+        best_rows = np.zeros((len(rows), 0), dtype=np.int64)
+        best_scores = np.zeros((len(rows), 0), dtype=np.float32)
+        for start in range(0, len(self), block_size):
+            block = np.arange(start, min(start + block_size, len(self)))
+            # Merge this block with the best so far and keep the top k per query
+            scores = np.hstack([best_scores, self._scores(rows, block)])
+            candidates = np.hstack([best_rows, np.broadcast_to(block, (len(rows), len(block)))])
+            keep = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_rows = np.take_along_axis(candidates, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def similar(self, name, topn=5, approximate=False, same_place=False):
+        """Hotels most similar to name as a DataFrame of name, place, similarity."""
+        row = self._positions.get_indexer([name])[0]
+        if row < 0:
+            return pd.DataFrame()
+
+        candidates = self._candidates(row) if approximate else None
+        if candidates is not None and len(candidates) <= topn:
+            candidates = None  # Too few hotels share a bucket, fall back to exact search
+        if same_place:
+            in_place = self._same_place(row)
+            candidates = in_place if candidates is None else np.intersect1d(candidates, in_place)
+
+        if candidates is None:
+            rows, scores = self.query(row, k=topn + 1)
+            rows, scores = rows[0], scores[0]
+        else:
+            candidate_scores = self._scores([row], candidates)[0]
+            k = min(topn + 1, len(candidates))
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+            top = top[np.argsort(-candidate_scores[top], kind="stable")]
+            rows, scores = candidates[top], candidate_scores[top]
+
+        keep = rows != row
+        rows, scores = rows[keep][:topn], scores[keep][:topn]
+        return pd.DataFrame({
+            "name": self.names[rows],
+            "place": self.places[rows],
+            "similarity": np.round(scores, 4),
+        })
@@ -1,46 +1,38 @@
 """
 Update the hotel recommendation model with comprehensive hotel data
-"""
-import pickle
-import pandas as pd
-import numpy as np
-
-print("🔄 Updating Hotel Recommendation Model with comprehensive data...")
-print("=" * 60)
-
-# Define the CFRecommender class
-class CFRecommender:
-    MODEL_NAME = 'Collaborative Filtering'
-
-    def __init__(self, cf_predictions_df, items_df):
-        self.cf_predictions_df = cf_predictions_df
-        self.items_df = items_df
 
-    def get_model_name(self):
-        return self.MODEL_NAME
+The catalogue is generated with vectorized NumPy, so it can be scaled up for
+load testing the recommender:
 
-    def recommend_items(self, place, days, budget, topn=5):
-        # Filter available hotels based on place, days, and budget
-        filtered_hotels = self.items_df[
-            (self.items_df["place"] == place) &
-            (self.items_df["days"] == days) &
-            (self.items_df["price"] <= budget)
-        ]
+    python update_hotel_data.py                                   # 8 cities x 10 hotels x 30 days
+    python update_hotel_data.py --city-scale 16 --hotel-scale 16 --day-scale 17 --no-model   # ~10M rows
 
-        if filtered_hotels.empty:
-            return pd.DataFrame()  # No hotels match criteria
+Besides cf_recommender.pkl, the catalogue is written as Parquet
+(data/hotels_catalogue.parquet by default).
 
-        # Get top recommended hotels sorted by price
-        recommendations_df = filtered_hotels.groupby("name")["price"].min().reset_index()
-        recommendations_df = recommendations_df.sort_values(by="price", ascending=True).head(topn)
+The collaborative-filtering model is trained with implicit ALS on the booking
+history in data/hotels.csv (userCode, name, ...) when it exists, otherwise on
+synthetic bookings drawn from the generated catalogue.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import pandas as pd
+import numpy as np
 
-        return recommendations_df
+from als import ImplicitALS
+from catalogue_delta import DeltaLog, delta_log_path
+from recommender import CFRecommender
+from similarity import SimilarityIndex
 
-# Create comprehensive hotel data
-print("\n📊 Creating comprehensive hotel database...")
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from voyage_common.threads import configure_threads
 
-cities = ['Paris', 'Barcelona', 'London', 'Rome', 'Amsterdam', 'Berlin', 'Madrid', 'Vienna']
-hotel_names = {
+BASE_CITIES = ['Paris', 'Barcelona', 'London', 'Rome', 'Amsterdam', 'Berlin', 'Madrid', 'Vienna']
+BASE_HOTEL_NAMES = {
     'Paris': ['Eiffel Tower Hotel', 'Louvre Palace', 'Champs Elysees Inn', 'Seine Riverside', 'Montmartre View', 
               'Arc de Triomphe Suites', 'Notre Dame Lodge', 'Versailles Grand', 'Latin Quarter Hotel', 'Marais Boutique'],
     'Barcelona': ['Sagrada Familia Hotel', 'Beachfront Resort', 'Gothic Quarter Inn', 'Ramblas Central', 'Park Guell View',
@@ -59,75 +51,224 @@ hotel_names = {
                'Museumsquartier Hotel', 'Prater Park Inn', 'Hofburg Central', 'Graben Boutique', 'Leopoldstadt Suites']
 }
 
-# Generate comprehensive hotel data
-hotels_data = []
-np.random.seed(42)
-
-for city in cities:
-    city_hotels = hotel_names.get(city, [f'{city} Hotel {i}' for i in range(1, 11)])
-    
-    for hotel_name in city_hotels:
-        # Create multiple entries for different day ranges and price points
-        for days in range(1, 31):  # 1 to 30 days
-            # Base price varies by hotel type
-            base_price = np.random.uniform(50, 300)
-            
-            # Price variations for different day ranges
-            if days <= 3:
-                price = base_price * (1 + np.random.uniform(-0.2, 0.3))  # Short stays
-            elif days <= 7:
-                price = base_price * (1 + np.random.uniform(-0.1, 0.2))  # Medium stays
-            else:
-                price = base_price * (1 + np.random.uniform(-0.3, 0.1))  # Long stays (discount)
-            
-            # Ensure price is reasonable
-            price = max(30, min(500, price))
-            
-            hotels_data.append({
-                'name': hotel_name,
-                'place': city,
-                'days': days,
-                'price': round(price, 2)
-            })
-
-items_df = pd.DataFrame(hotels_data)
-cf_predictions_df = pd.DataFrame()  # Empty for this model type
-
-# Create model instance
-model = CFRecommender(cf_predictions_df, items_df)
-
-# Save updated model
-print(f"\n💾 Saving updated model...")
-print(f"   Total hotels: {len(items_df)}")
-print(f"   Cities: {sorted(items_df['place'].unique())}")
-print(f"   Days range: {items_df['days'].min()} - {items_df['days'].max()}")
-print(f"   Price range: ${items_df['price'].min():.2f} - ${items_df['price'].max():.2f}")
-
-with open('cf_recommender.pkl', 'wb') as f:
-    pickle.dump(model, f)
-
-print("   ✓ Saved: cf_recommender.pkl")
-
-# Test recommendations
-print("\n🧪 Testing recommendations...")
-test_cases = [
-    ('Paris', 3, 200),
-    ('Barcelona', 5, 150),
-    ('London', 7, 250),
-    ('Rome', 2, 100),
-    ('Amsterdam', 4, 180)
+BASE_HOTELS_PER_CITY = 10
+BASE_DAYS = 30
+
+# (max days, lowest, highest) price multiplier offsets per stay length band
+PRICE_BANDS = [
+    (3, -0.2, 0.3),   # Short stays
+    (7, -0.1, 0.2),   # Medium stays
+    (None, -0.3, 0.1),  # Long stays (discount)
 ]
 
-for city, days, budget in test_cases:
-    recs = model.recommend_items(city, days, budget, topn=3)
-    if not recs.empty:
-        print(f"   ✓ {city}, {days} days, ${budget} budget: {len(recs)} hotels found")
-    else:
-        print(f"   ⚠️  {city}, {days} days, ${budget} budget: No hotels found")
 
-print("\n✅ Hotel data updated successfully!")
-print("=" * 60)
-print("\n🔄 Please restart the Streamlit app to see the changes:")
-print("   1. Stop current app: pkill -f streamlit")
-print("   2. Restart: cd 'Travel Recommendation Model' && streamlit run app.py")
+def _city_names(n_cities):
+    # The base cities first, then numbered copies: 'Paris 2', 'Barcelona 2', ...
+    return [
+        BASE_CITIES[i % len(BASE_CITIES)] + ('' if i < len(BASE_CITIES) else f' {i // len(BASE_CITIES) + 1}')
+        for i in range(n_cities)
+    ]
+
+
+def _hotel_names(city, n_hotels):
+    known = BASE_HOTEL_NAMES.get(city, [])[:n_hotels]
+    return known + [f'{city} Hotel {i}' for i in range(len(known) + 1, n_hotels + 1)]
+
+
+def generate_catalogue(city_scale=1.0, hotel_scale=1.0, day_scale=1.0, seed=42):
+    """
+    Build items_df with one row per (city, hotel, days).
+
+    Scale factors multiply the base 8 cities, 10 hotels per city and 30-day
+    range. name and place are categoricals, so 10M+ rows fit comfortably in
+    memory; the same seed always produces the same catalogue.
+    """
+    n_cities = max(1, round(len(BASE_CITIES) * city_scale))
+    n_hotels = max(1, round(BASE_HOTELS_PER_CITY * hotel_scale))
+    n_days = max(1, round(BASE_DAYS * day_scale))
+    n_rows = n_cities * n_hotels * n_days
+
+    rng = np.random.default_rng(seed)
+    cities = _city_names(n_cities)
+    names = [name for city in cities for name in _hotel_names(city, n_hotels)]
+
+    hotel_codes = np.repeat(np.arange(n_cities * n_hotels, dtype=np.int32), n_days)
+    days = np.tile(np.arange(1, n_days + 1, dtype=np.int16), n_cities * n_hotels)
+
+    # Base price varies by hotel and stay, then a band-dependent variation
+    base_price = rng.uniform(50, 300, size=n_rows)
+    band = np.searchsorted([limit for limit, _, _ in PRICE_BANDS[:-1]], days, side='left')
+    low = np.array([low for _, low, _ in PRICE_BANDS])[band]
+    high = np.array([high for _, _, high in PRICE_BANDS])[band]
+    price = base_price * (1 + low + (high - low) * rng.random(n_rows))
+
+    # Ensure price is reasonable
+    price = np.clip(price, 30, 500).round(2)
+
+    return pd.DataFrame({
+        'name': pd.Categorical.from_codes(hotel_codes, names),
+        'place': pd.Categorical.from_codes(hotel_codes // n_hotels, cities),
+        'days': days,
+        'price': price,
+    })
+
+
+def generate_bookings(items_df, n_bookings=20000, n_users=2000, home_city_share=0.8, seed=42):
+    """
+    Synthetic booking history: every user has a home city and a preferred
+    price tier, and mostly books hotels close to that tier in their home city.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Hotels ordered by (place, mean price), so a tier in [0, 1] maps to a position in the city
+    hotels = (items_df.groupby(['place', 'name'], observed=True)['price'].mean()
+              .reset_index().sort_values(['place', 'price'], kind='mergesort', ignore_index=True))
+    city_codes, cities = pd.factorize(hotels['place'])
+    city_start = np.searchsorted(city_codes, np.arange(len(cities)))
+    city_size = np.bincount(city_codes, minlength=len(cities))
+
+    user_city = rng.integers(len(cities), size=n_users)
+    user_tier = rng.random(n_users)
+
+    users = rng.integers(n_users, size=n_bookings)
+    away = rng.random(n_bookings) >= home_city_share
+    city = np.where(away, rng.integers(len(cities), size=n_bookings), user_city[users])
+    offset = np.rint(user_tier[users] * (city_size[city] - 1) + rng.normal(0, 1.5, n_bookings))
+    hotel = city_start[city] + np.clip(offset, 0, city_size[city] - 1).astype(np.int64)
+
+    return pd.DataFrame({
+        'userCode': users,
+        'name': hotels['name'].to_numpy()[hotel],
+        'place': hotels['place'].to_numpy()[hotel],
+    })
+
+
+def load_bookings(items_df, args):
+    if os.path.exists(args.bookings_csv):
+        print(f"   Using booking history from {args.bookings_csv}")
+        return pd.read_csv(args.bookings_csv, usecols=['userCode', 'name'])
+    print(f"   {args.bookings_csv} not found, generating {args.bookings:,} synthetic bookings")
+    return generate_bookings(items_df, n_bookings=args.bookings, n_users=args.users, seed=args.seed)
+
+
+def write_catalogue(items_df, path):
+    """Write items_df as Parquet (requires pyarrow)."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    items_df.to_parquet(path, index=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the hotel catalogue and recommender model")
+    parser.add_argument('--city-scale', type=float, default=1.0, help='Multiplier for the 8 base cities')
+    parser.add_argument('--hotel-scale', type=float, default=1.0, help='Multiplier for the 10 hotels per city')
+    parser.add_argument('--day-scale', type=float, default=1.0, help='Multiplier for the 1-30 day range')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--catalogue', default='data/hotels_catalogue.parquet',
+                        help="Parquet output path ('' to skip)")
+    parser.add_argument('--no-model', action='store_true', help='Skip writing cf_recommender.pkl')
+    parser.add_argument('--bookings-csv', default='data/hotels.csv', help='Booking history used to train ALS')
+    parser.add_argument('--bookings', type=int, default=20000, help='Synthetic bookings when no history exists')
+    parser.add_argument('--users', type=int, default=2000, help='Synthetic users when no history exists')
+    parser.add_argument('--factors', type=int, default=32)
+    parser.add_argument('--iterations', type=int, default=10)
+    return parser.parse_args()
+
+
+def main(args):
+    print("🔄 Updating Hotel Recommendation Model with comprehensive data...")
+    print("=" * 60)
+    # ALS is BLAS-bound; give it this process's whole share of the CPUs
+    configure_threads("training")
+
+    # Create comprehensive hotel data
+    print("\n📊 Creating comprehensive hotel database...")
+    start = time.perf_counter()
+    items_df = generate_catalogue(args.city_scale, args.hotel_scale, args.day_scale, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"   ✓ Generated {len(items_df):,} rows in {elapsed:.2f}s ({len(items_df) / elapsed:,.0f} rows/s)")
+
+    if args.catalogue:
+        try:
+            start = time.perf_counter()
+            write_catalogue(items_df, args.catalogue)
+            print(f"   ✓ Saved: {args.catalogue} ({time.perf_counter() - start:.2f}s)")
+        except ImportError as e:
+            print(f"   ⚠️  Could not write Parquet catalogue ({e}). Install pyarrow to enable it.")
+
+    if args.no_model:
+        return
+
+    cf_predictions_df = pd.DataFrame()  # Empty for this model type
+
+    # Train the collaborative-filtering factors
+    print("\n🧠 Training implicit ALS on booking history...")
+    bookings_df = load_bookings(items_df, args)
+    cf_model = ImplicitALS(factors=args.factors, iterations=args.iterations, seed=args.seed)
+    cf_model.fit_bookings(bookings_df)
+    print(f"   ✓ {len(cf_model.user_codes):,} users x {len(cf_model.item_names):,} hotels, "
+          f"{len(bookings_df):,} bookings in {cf_model.fit_seconds:.2f}s")
+
+    # Similar-hotel index from price profiles, places and latent factors
+    print("\n🔗 Building similar-hotels index...")
+    start = time.perf_counter()
+    similarity_index = SimilarityIndex.from_catalogue(items_df, cf_model=cf_model)
+    print(f"   ✓ {len(similarity_index):,} hotels indexed in {time.perf_counter() - start:.2f}s")
+
+    # A regenerated catalogue supersedes every price change logged so far
+    delta_log = DeltaLog(delta_log_path('cf_recommender.pkl'))
+    superseded_seq = delta_log.last_seq()
+
+    # Create model instance
+    model = CFRecommender(cf_predictions_df, items_df, cf_model=cf_model, similarity_index=similarity_index,
+                          delta_seq=superseded_seq)
+
+    # Save updated model
+    print(f"\n💾 Saving updated model...")
+    print(f"   Total hotels: {len(items_df)}")
+    print(f"   Cities: {model.get_cities()[:10]}{' ...' if len(model.get_cities()) > 10 else ''}")
+    print(f"   Days range: {items_df['days'].min()} - {items_df['days'].max()}")
+    print(f"   Price range: ${items_df['price'].min():.2f} - ${items_df['price'].max():.2f}")
+
+    # Write to a temporary file and rename, so a running app never reads a partial pickle
+    with open('cf_recommender.pkl.tmp', 'wb') as f:
+        pickle.dump(model, f)
+    os.replace('cf_recommender.pkl.tmp', 'cf_recommender.pkl')
+
+    print("   ✓ Saved: cf_recommender.pkl")
+    if superseded_seq:
+        delta_log.truncate_through(superseded_seq)
+        print(f"   ✓ Cleared {delta_log.path} up to seq {superseded_seq}")
+
+    # Test recommendations
+    print("\n🧪 Testing recommendations...")
+    test_cases = [
+        ('Paris', 3, 200),
+        ('Barcelona', 5, 150),
+        ('London', 7, 250),
+        ('Rome', 2, 100),
+        ('Amsterdam', 4, 180)
+    ]
+
+    for city, days, budget in test_cases:
+        recs = model.recommend_items(city, days, budget, topn=3)
+        if not recs.empty:
+            print(f"   ✓ {city}, {days} days, ${budget} budget: {len(recs)} hotels found")
+        else:
+            print(f"   ⚠️  {city}, {days} days, ${budget} budget: No hotels found")
+
+    user_code = cf_model.user_codes[0]
+    recs = model.recommend_items('Paris', 3, 300, topn=3, user_code=user_code)
+    print(f"   ✓ Personalised for user {user_code}: {', '.join(recs['name'])}")
+
+    similar = model.similar_items('Eiffel Tower Hotel', topn=3)
+    print(f"   ✓ Similar to Eiffel Tower Hotel: {', '.join(similar['name'])}")
+
+    print("\n✅ Hotel data updated successfully!")
+    print("=" * 60)
+    print("\n🔄 A running Streamlit app picks up the new model on its next rerun.")
+    print("   For individual price changes use catalogue_delta.py instead of a full rebuild.")
+    print("   To start it: cd 'Travel Recommendation Model' && streamlit run app.py")
+
 
+if __name__ == "__main__":
+    main(parse_args())
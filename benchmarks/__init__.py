@@ -0,0 +1,10 @@
+"""
+Offline performance benchmarks for the three models.
+
+    python -m benchmarks run                      # all cases, small + medium scales
+    python -m benchmarks run --save-baseline      # store benchmarks/baselines/local.json
+    python -m benchmarks run --compare            # verdict against the stored baseline
+    python -m benchmarks compare old.json new.json
+
+See benchmarks/readme.md.
+"""
@@ -0,0 +1,100 @@
+"""
+Command line for the benchmark suite; run from the repository root with
+python -m benchmarks.
+"""
+import argparse
+import os
+import sys
+import time
+import traceback
+
+from benchmarks import dag_parse, harness
+from benchmarks.cases import CASES, SCALES
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "local.json")
+
+
+def run(args):
+    results, failures = [], []
+    for case in args.cases:
+        for scale in args.scales:
+            print(f"⏱️  {case} [{scale}: {SCALES[case][scale]:,}]...", flush=True)
+            start = time.perf_counter()
+            try:
+                case_results = CASES[case](scale)
+            except harness.SkipCase as reason:
+                print(f"      skipped: {reason}")
+                continue
+            except Exception:
+                # A missing optional dependency should not hide the other cases
+                traceback.print_exc()
+                failures.append(f"{case}[{scale}]")
+                continue
+            results.extend(case_results)
+            harness.print_results(case_results)
+            print(f"      ({time.perf_counter() - start:.1f}s)")
+
+    if args.output:
+        harness.save_results(args.output, results)
+        print(f"\n💾 Results: {args.output}")
+    if args.save_baseline:
+        harness.save_results(args.baseline, results)
+        print(f"💾 Baseline: {args.baseline}")
+
+    regressions = []
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"⚠️  No baseline at {args.baseline}; run with --save-baseline first")
+        else:
+            rows = harness.compare(harness.load_results(args.baseline), results, args.threshold)
+            regressions = harness.print_comparison(rows, args.threshold)
+
+    if failures:
+        print(f"⚠️  Failed: {', '.join(failures)}")
+    return 1 if regressions or failures else 0
+
+
+def compare(args):
+    rows = harness.compare(harness.load_results(args.baseline_file), harness.load_results(args.results_file),
+                           args.threshold)
+    return 1 if harness.print_comparison(rows, args.threshold) else 0
+
+
+def check_dags(args):
+    problems = dag_parse.check(args.max_ms, args.repeat)
+    print(f"\n{'❌' if problems else '✅'} {problems} DAG parse problem(s)")
+    return 1 if problems else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Performance benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runner = commands.add_parser("run", help="Run benchmark cases")
+    runner.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    runner.add_argument("--scales", nargs="+", choices=["small", "medium", "large"], default=["small", "medium"])
+    runner.add_argument("--output", help="Write the results to this JSON file")
+    runner.add_argument("--baseline", default=DEFAULT_BASELINE)
+    runner.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    runner.add_argument("--compare", action="store_true", help="Compare the results with the baseline")
+    runner.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD)
+
+    comparer = commands.add_parser("compare", help="Compare two result files")
+    comparer.add_argument("baseline_file")
+    comparer.add_argument("results_file")
+    comparer.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD)
+
+    dags = commands.add_parser("check-dags", help="Fail if a DAG file imports heavy modules or parses slowly")
+    dags.add_argument("--max-ms", type=float, default=dag_parse.DEFAULT_MAX_MS)
+    dags.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per DAG file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return {"run": run, "compare": compare, "check-dags": check_dags}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+The benchmark cases. Each one runs the production code path at one scale
+and returns a list of results (see harness.py):
+
+    flight_ingest     DataLoader.load_data throughput            (CSV rows)
+    flight_db_ingest  DatabaseLoader chunked read throughput     (SQLite rows)
+    flight_transform  DataTransformer.transform throughput       (rows)
+    flight_partitions monthly partitions transformed in one      (rows)
+                      process vs all cores, and a 3-month range
+    flight_fit        RandomForestModel.random_forest fit time   (training rows)
+    flight_predict    POST /predict latency via the test client  (rows the served model was trained on)
+    flight_batch      batch_scoring.score_file throughput        (CSV rows, all cores)
+    flight_threads    concurrent single-row predicts, pickled    (client threads)
+                      n_jobs=-1 vs the serving thread budget
+    dag_parse.<file>  DAG file import time after Airflow         (fresh interpreters; needs Airflow)
+    gender_predict    predict_price latency, hashed embeddings   (requests)
+    travel_recommend  CFRecommender.recommend_items latency      (catalogue rows)
+"""
+import ast
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import dag_parse, harness
+from benchmarks.synthetic import (
+    CITIES, FLIGHT_DIR, GENDER_DIR, TRAVEL_DIR, HashingEncoder, add_path, gender_artifacts,
+    generate_flights, load_module,
+)
+
+SCALES = {
+    "flight_ingest": {"small": 10_000, "medium": 100_000, "large": 1_000_000},
+    "flight_db_ingest": {"small": 10_000, "medium": 100_000, "large": 1_000_000},
+    "flight_transform": {"small": 10_000, "medium": 100_000, "large": 1_000_000},
+    "flight_partitions": {"small": 100_000, "medium": 1_000_000, "large": 5_000_000},
+    "flight_fit": {"small": 2_000, "medium": 10_000, "large": 40_000},
+    "flight_predict": {"small": 2_000, "medium": 20_000, "large": 100_000},
+    "flight_batch": {"small": 50_000, "medium": 500_000, "large": 5_000_000},
+    "flight_threads": {"small": 4, "medium": 16, "large": 64},
+    "dag_parse": {"small": 5, "medium": 10, "large": 30},
+    "gender_predict": {"small": 50, "medium": 200, "large": 1_000},
+    "travel_recommend": {"small": 100_000, "medium": 1_000_000, "large": 5_000_000},
+}
+FLIGHT_PREDICT_REQUESTS = 100
+FLIGHT_BATCH_TRAINING_ROWS = 20_000
+FLIGHT_THREADS_REQUESTS = 50  # per client thread
+TRAVEL_QUERIES = 500
+
+
+def _flight_utils():
+    # dags/utils is shared with the Airflow DAG; import it as dags.utils from the project folder
+    add_path(FLIGHT_DIR)
+    from dags.utils.data_ingestion import DataLoader
+    from dags.utils.data_transformation import DataTransformer
+    from dags.utils.model_training import RandomForestModel
+    return DataLoader, DataTransformer, RandomForestModel
+
+
+def flight_ingest(scale):
+    DataLoader, _, _ = _flight_utils()
+    n_rows = SCALES["flight_ingest"][scale]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        generate_flights(n_rows).to_csv(path, index=False)
+        seconds = harness.time_call(DataLoader(path).load_data)
+    return [harness.throughput("flight_ingest", scale, n_rows, seconds)]
+
+
+def flight_db_ingest(scale):
+    import sqlite3
+
+    add_path(FLIGHT_DIR)
+    from dags.utils.data_ingestion import DatabaseLoader
+
+    n_rows = SCALES["flight_db_ingest"][scale]
+    flights = generate_flights(n_rows)
+    flights["date"] = pd.to_datetime(flights["date"]).dt.strftime("%Y-%m-%d")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.db")
+        with sqlite3.connect(path) as connection:
+            flights.to_sql("flights", connection, index=False)
+        loader = DatabaseLoader(f"sqlite:///{path}")
+        seconds = harness.time_call(lambda: sum(len(chunk) for chunk in loader.iter_chunks()))
+    return [harness.throughput("flight_db_ingest", scale, n_rows, seconds, chunk_size=loader.chunk_size)]
+
+
+def flight_transform(scale):
+    _, DataTransformer, _ = _flight_utils()
+    n_rows = SCALES["flight_transform"][scale]
+    flights = generate_flights(n_rows)
+    seconds = harness.time_call(DataTransformer(flights).transform)
+    return [harness.throughput("flight_transform", scale, n_rows, seconds)]
+
+
+def flight_partitions(scale):
+    add_path(FLIGHT_DIR)
+    from dags.utils.data_ingestion import DataLoader, write_partitions
+    from dags.utils.data_transformation import DataTransformer
+
+    n_rows = SCALES["flight_partitions"][scale]
+    workers = os.cpu_count() or 1
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        n_partitions = len(write_partitions(generate_flights(n_rows), tmp))
+        for variant, n_workers in (("serial", 1), ("parallel", workers)):
+            seconds = harness.time_call(DataTransformer(DataLoader(tmp), workers=n_workers).transform, repeat=1)
+            results.append(harness.throughput(f"flight_partitions.{variant}", scale, n_rows, seconds,
+                                              partitions=n_partitions, workers=n_workers))
+        # A date-bounded run: the last three months of the synthetic history
+        loader = DataLoader(tmp, start="2023-01-01", end="2023-03-31")
+        seconds = harness.time_call(DataTransformer(loader, workers=workers).transform, repeat=1)
+        results.append(harness.duration("flight_partitions.pruned", scale, seconds,
+                                        partitions=len(loader.partitions()), of=n_partitions))
+    return results
+
+
+def flight_fit(scale):
+    _, DataTransformer, RandomForestModel = _flight_utils()
+    n_rows = SCALES["flight_fit"][scale]
+    X, Y = DataTransformer(generate_flights(n_rows)).transform()
+    seconds = harness.time_call(RandomForestModel(X, Y).random_forest, repeat=1)
+    return [harness.duration("flight_fit", scale, seconds, rows=n_rows, features=X.shape[1])]
+
+
+def _flight_feature_order():
+    # The module-level feature_order list of the Flask app, read without importing it
+    with open(os.path.join(FLIGHT_DIR, "app.py")) as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "feature_order":
+            return ast.literal_eval(node.value)
+    raise LookupError("feature_order not found in app.py")
+
+
+def _flight_training_matrix(flights, feature_order):
+    # The encoding train_model.py produces: one-hot route, class and agency plus month, year, day
+    dates = pd.to_datetime(flights["date"])
+    X = np.zeros((len(flights), len(feature_order)))
+    position = {name: i for i, name in enumerate(feature_order)}
+    for prefix, column in (("from", "from"), ("destination", "to"), ("flightType", "flightType"), ("agency", "agency")):
+        names = (prefix + "_" + flights[column].str.replace(" (", "_").str.replace(")", "").str.replace(" ", "_"))
+        X[np.arange(len(flights)), names.map(position).to_numpy(dtype=int)] = 1
+    X[:, position["month"]] = dates.dt.month
+    X[:, position["year"]] = dates.dt.year
+    X[:, position["day"]] = dates.dt.day
+    return X
+
+
+def _save_flight_model(folder, flights):
+    # Train the served model like train_model.py, on synthetic flights
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    X = _flight_training_matrix(flights, _flight_feature_order())
+    scaler = StandardScaler().fit(X)
+    model = RandomForestRegressor(n_estimators=300, max_depth=15, min_samples_split=10, max_features="sqrt",
+                                  random_state=42, n_jobs=-1).fit(scaler.transform(X), flights["price"])
+    for name, artifact in (("rf_model.pkl", model), ("scaler.pkl", scaler)):
+        with open(os.path.join(folder, name), "wb") as f:
+            pickle.dump(artifact, f)
+
+
+def flight_predict(scale):
+    n_rows = SCALES["flight_predict"][scale]
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_flight_model(tmp, generate_flights(n_rows))
+        os.environ["FLIGHT_MODEL_DIR"] = tmp
+        try:
+            app = load_module(f"flight_app_{scale}", os.path.join(FLIGHT_DIR, "app.py")).app
+        finally:
+            del os.environ["FLIGHT_MODEL_DIR"]
+
+    client = app.test_client()
+    rng = np.random.default_rng(0)
+    forms = [{
+        "from": CITIES[rng.integers(len(CITIES))], "destination": CITIES[rng.integers(len(CITIES))],
+        "flightType": "economic", "agency": "Rainbow", "month": "5", "year": "2021", "day": "12",
+    } for _ in range(FLIGHT_PREDICT_REQUESTS)]
+    client.post("/predict", data=forms[0]).close()  # First request pays for matplotlib's font cache
+
+    def post(form):
+        # Closing the response releases the admission slot, as a real server does after sending it
+        with client.post("/predict", data=form) as response:
+            assert response.status_code == 200
+
+    seconds = harness.time_each(post, forms)
+    return [harness.latency("flight_predict", scale, seconds, trained_rows=n_rows)]
+
+
+def flight_batch(scale):
+    add_path(FLIGHT_DIR)
+    from dags.utils.batch_scoring import score_file
+
+    n_rows = SCALES["flight_batch"][scale]
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_flight_model(tmp, generate_flights(FLIGHT_BATCH_TRAINING_ROWS))
+        input_path = os.path.join(tmp, "candidates.csv")
+        generate_flights(n_rows, seed=1).drop(columns=["price"]).to_csv(input_path, index=False)
+        seconds = harness.time_call(
+            lambda: score_file(input_path, os.path.join(tmp, "predictions.parquet"), tmp), repeat=1)
+    return [harness.throughput("flight_batch", scale, n_rows, seconds, workers=os.cpu_count())]
+
+
+def _concurrent_predicts(model, rows, clients):
+    # Every client thread predicts its rows one at a time, like concurrent /predict requests
+    def client(client_rows):
+        seconds = []
+        for row in client_rows:
+            start = time.perf_counter()
+            model.predict(row[None, :])
+            seconds.append(time.perf_counter() - start)
+        return seconds
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        per_client = list(pool.map(client, np.array_split(rows, clients)))
+    return time.perf_counter() - start, np.concatenate(per_client)
+
+
+def flight_threads(scale):
+    from voyage_common.threads import configure_threads
+
+    clients = SCALES["flight_threads"][scale]
+    with tempfile.TemporaryDirectory() as tmp:
+        # train_model.py used to pickle the forest with n_jobs=-1
+        _save_flight_model(tmp, generate_flights(FLIGHT_BATCH_TRAINING_ROWS))
+        with open(os.path.join(tmp, "rf_model.pkl"), "rb") as f:
+            model = pickle.load(f)
+        with open(os.path.join(tmp, "scaler.pkl"), "rb") as f:
+            scaler = pickle.load(f)
+    rows = scaler.transform(_flight_training_matrix(generate_flights(clients * FLIGHT_THREADS_REQUESTS, seed=2),
+                                                    _flight_feature_order()))
+    model.predict(rows[:1])
+
+    results = []
+    for variant in ("pickled", "budgeted"):
+        if variant == "budgeted":
+            configure_threads("serving", verbose=False).apply(model)
+        wall, seconds = _concurrent_predicts(model, rows, clients)
+        ms = seconds * 1000
+        results.append(harness.throughput(f"flight_threads.{variant}", scale, len(rows), [wall], unit="predicts/s",
+                                          n_jobs=model.n_jobs, clients=clients,
+                                          p50_ms=round(float(np.percentile(ms, 50)), 3),
+                                          p99_ms=round(float(np.percentile(ms, 99)), 3)))
+    return results
+
+
+def dag_parse_time(scale):
+    if not dag_parse.airflow_available():
+        raise harness.SkipCase("Airflow is not installed")
+    results = []
+    for path in dag_parse.dag_files():
+        seconds, modules = dag_parse.measure(path, repeat=SCALES["dag_parse"][scale])
+        name = os.path.splitext(os.path.basename(path))[0]
+        results.append(harness.latency(f"dag_parse.{name}", scale, seconds, new_modules=len(modules),
+                                       heavy_modules=sorted(dag_parse.HEAVY_MODULES.intersection(modules))))
+    return results
+
+
+def gender_predict(scale):
+    n_requests = SCALES["gender_predict"][scale]
+    gender_app = load_module("gender_app", os.path.join(GENDER_DIR, "app.py"))
+    gender_app.startup.wait(timeout=300)  # Do not time against the app's own background model load
+
+    artifacts = gender_artifacts(HashingEncoder())
+    rng = np.random.default_rng(0)
+    inputs = [{"code": int(rng.integers(1000)), "company": "Acme Factory", "name": f"Traveller {i}",
+               "age": int(rng.integers(18, 80))} for i in range(n_requests)]
+
+    def predict(row):
+        gender_app.predict_price(row, artifacts["classifier"], artifacts["pca"], artifacts["scaler"],
+                                 encoder=artifacts["encoder"])
+
+    seconds = harness.time_each(predict, inputs)
+    return [harness.latency("gender_predict", scale, seconds, encoder="hashing stand-in")]
+
+
+def travel_recommend(scale):
+    add_path(TRAVEL_DIR)
+    from recommender import CFRecommender
+    from update_hotel_data import generate_catalogue
+
+    n_rows = SCALES["travel_recommend"][scale]
+    items_df = generate_catalogue(city_scale=n_rows / (8 * 100 * 30), hotel_scale=10)
+    model = CFRecommender(pd.DataFrame(), items_df)
+    cities = model.get_cities()
+    rng = np.random.default_rng(0)
+    queries = [(cities[rng.integers(len(cities))], int(rng.integers(1, 31)), float(rng.uniform(50, 150)))
+               for _ in range(TRAVEL_QUERIES)]
+
+    seconds = harness.time_each(lambda query: model.recommend_items(*query, topn=5), queries)
+    return [harness.latency("travel_recommend", scale, seconds, rows=len(items_df))]
+
+
+CASES = {
+    "flight_ingest": flight_ingest,
+    "flight_db_ingest": flight_db_ingest,
+    "flight_transform": flight_transform,
+    "flight_partitions": flight_partitions,
+    "flight_fit": flight_fit,
+    "flight_predict": flight_predict,
+    "flight_batch": flight_batch,
+    "flight_threads": flight_threads,
+    "dag_parse": dag_parse_time,
+    "gender_predict": gender_predict,
+    "travel_recommend": travel_recommend,
+}
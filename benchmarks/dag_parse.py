@@ -0,0 +1,148 @@
+"""
+Parse cost of the Airflow DAG files.
+
+The scheduler re-imports every DAG file continuously, so a DAG file must
+only import Airflow at module level and leave pandas, scikit-learn and
+friends to the task callables. Two checks enforce that:
+
+- static: the module-level imports of each DAG file, followed into the
+  local modules it imports (utils/...), must not reach HEAVY_MODULES.
+  Needs nothing but the standard library.
+- runtime (when Airflow is installed): each DAG file is imported in a fresh
+  interpreter after Airflow itself, as the DAG processor does; the import
+  time and the top-level modules it adds are measured.
+
+python -m benchmarks check-dags runs both and exits with status 1 on a heavy
+import or a parse slower than --max-ms; the dag_parse benchmark case tracks
+the parse time against the baseline.
+"""
+import ast
+import glob
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from benchmarks.synthetic import FLIGHT_DIR
+
+DAG_DIRS = [os.path.join(FLIGHT_DIR, "dags")]
+HEAVY_MODULES = frozenset({"pandas", "numpy", "sklearn", "scipy", "pyarrow", "matplotlib", "mlflow", "torch",
+                           "sentence_transformers", "joblib"})
+DEFAULT_MAX_MS = 250.0
+
+# Run in a fresh interpreter: time the DAG module's own import, after Airflow is already loaded
+PROBE = r"""
+import importlib.util, json, sys, time
+sys.path.insert(0, {dags_dir!r})
+import airflow
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+before = set(sys.modules)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("dag_under_test", {path!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": sorted({{m.split(".")[0] for m in set(sys.modules) - before}})}}))
+"""
+
+
+def dag_files():
+    return sorted(path for folder in DAG_DIRS for path in glob.glob(os.path.join(folder, "*.py")))
+
+
+def airflow_available():
+    return importlib.util.find_spec("airflow") is not None
+
+
+def _module_level_imports(tree):
+    # Statements that run on import: the module body, including if/try/with blocks, but not functions or classes
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield node.lineno, alias.name
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            yield node.lineno, node.module
+            for alias in node.names:
+                yield node.lineno, f"{node.module}.{alias.name}"
+        elif isinstance(node, (ast.If, ast.Try, ast.With)):
+            for field in ("body", "orelse", "finalbody", "handlers"):
+                pending.extend(getattr(node, field, []))
+        elif isinstance(node, ast.ExceptHandler):
+            pending.extend(node.body)
+
+
+def _local_file(module, root):
+    base = os.path.join(root, *module.split("."))
+    for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def static_violations(path, root=None, _seen=None):
+    """(file, line, module) for every heavy module reached through module-level imports."""
+    root = root or os.path.dirname(path)
+    seen = _seen if _seen is not None else set()
+    seen.add(path)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    violations, flagged_lines = [], set()
+    for lineno, module in _module_level_imports(tree):
+        if module.split(".")[0] in HEAVY_MODULES:
+            if lineno not in flagged_lines:
+                violations.append((path, lineno, module))
+                flagged_lines.add(lineno)
+            continue
+        local = _local_file(module, root)
+        if local and local not in seen:
+            violations.extend(static_violations(local, root, seen))
+    return violations
+
+
+def measure(path, repeat=3):
+    """Import seconds of path in repeat fresh interpreters, and the top-level modules the import added."""
+    probe = PROBE.format(dags_dir=os.path.dirname(path), path=path)
+    seconds, modules = [], set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+        sample = json.loads(output.stdout.strip().splitlines()[-1])
+        seconds.append(sample["seconds"])
+        modules.update(sample["modules"])
+    return seconds, sorted(modules)
+
+
+def check(max_ms=DEFAULT_MAX_MS, repeat=3):
+    """Print the checks for every DAG file and return the number of problems found."""
+    problems = 0
+    runtime = airflow_available()
+    if not runtime:
+        print("⚠️  Airflow is not installed: only the static import check runs")
+
+    for path in dag_files():
+        name = os.path.relpath(path, FLIGHT_DIR)
+        file_problems = []
+        for file, lineno, module in static_violations(path):
+            file_problems.append(f"module-level import of {module} ({os.path.relpath(file, FLIGHT_DIR)}:{lineno})")
+
+        if runtime:
+            seconds, modules = measure(path, repeat)
+            median_ms = float(np.median(seconds)) * 1000
+            heavy = sorted(HEAVY_MODULES.intersection(modules))
+            if heavy:
+                file_problems.append(f"parsing imports {', '.join(heavy)}")
+            if median_ms > max_ms:
+                file_problems.append(f"parse took {median_ms:.0f} ms (limit {max_ms:.0f} ms)")
+            print(f"   {name}: {median_ms:.1f} ms, {len(modules)} new top-level modules")
+
+        for problem in file_problems:
+            print(f"❌ {name}: {problem}")
+        if not file_problems:
+            print(f"✅ {name}: parses without heavy imports")
+        problems += len(file_problems)
+    return problems
@@ -0,0 +1,141 @@
+"""
+Timing helpers, JSON result files and the regression verdict.
+
+Every benchmark result has one headline number (value, in unit) and says
+whether higher is better, so any two result files can be compared key by key.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.20  # 20% slower than the baseline counts as a regression
+
+
+class SkipCase(Exception):
+    """Raised by a case that cannot run in this environment by design (not a failure)."""
+
+
+def time_call(fn, repeat=3):
+    """Wall-clock seconds of fn() for each of repeat runs."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def time_each(fn, inputs, warmup=5):
+    """Wall-clock seconds of fn(x) for every x in inputs, after warmup untimed calls."""
+    for x in inputs[:warmup]:
+        fn(x)
+    seconds = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def result(case, scale, value, unit, higher_is_better, **details):
+    return {
+        "case": case,
+        "scale": scale,
+        "value": float(value),
+        "unit": unit,
+        "higher_is_better": higher_is_better,
+        "details": details,
+    }
+
+
+def throughput(case, scale, n_items, seconds, unit="rows/s", **details):
+    """Items per second from the median of repeated runs."""
+    median = float(np.median(seconds))
+    return result(case, scale, n_items / median, unit, True, seconds=round(median, 4), n=n_items, **details)
+
+
+def duration(case, scale, seconds, **details):
+    """Median seconds of repeated runs."""
+    return result(case, scale, np.median(seconds), "s", False, runs=[round(s, 4) for s in seconds], **details)
+
+
+def latency(case, scale, seconds, **details):
+    """p50 latency in ms, with mean, p95 and p99 alongside."""
+    ms = np.asarray(seconds) * 1000
+    return result(case, scale, np.percentile(ms, 50), "ms p50", False, mean=round(float(ms.mean()), 4),
+                  p95=round(float(np.percentile(ms, 95)), 4), p99=round(float(np.percentile(ms, 99)), 4),
+                  n=len(ms), **details)
+
+
+def key(entry):
+    return f"{entry['case']}[{entry['scale']}]"
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    One row per result in current: (key, baseline value, current value,
+    relative change, verdict). The change is signed so that positive always
+    means better; below -threshold is a regression.
+    """
+    previous = {key(entry): entry for entry in baseline}
+    rows = []
+    for entry in current:
+        old = previous.get(key(entry))
+        if old is None or old["value"] == 0:
+            rows.append((key(entry), None, entry["value"], None, "new"))
+            continue
+        change = (entry["value"] - old["value"]) / old["value"]
+        if not entry["higher_is_better"]:
+            change = -change
+        verdict = "REGRESSION" if change < -threshold else ("improved" if change > threshold else "ok")
+        rows.append((key(entry), old["value"], entry["value"], change, verdict))
+    return rows
+
+
+def print_results(results):
+    for entry in results:
+        print(f"   {key(entry):<34} {entry['value']:14,.3f} {entry['unit']}")
+
+
+def print_comparison(rows, threshold=DEFAULT_THRESHOLD):
+    print(f"\n📊 Against baseline (threshold {threshold:.0%}):")
+    for name, old, new, change, verdict in rows:
+        if change is None:
+            print(f"   {name:<34} {'':>12}   {new:12,.3f}   {'':>8}  {verdict}")
+        else:
+            print(f"   {name:<34} {old:12,.3f} → {new:12,.3f}   {change:+8.1%}  {verdict}")
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    print(f"\n{'❌' if regressions else '✅'} {len(regressions)} regression(s) in {len(rows)} results")
+    return regressions
@@ -0,0 +1,99 @@
+"""
+Synthetic inputs for the benchmarks: flights in the schema of
+dags/data/flights.csv, gender-model artifacts with a hashed stand-in for the
+sentence-transformer, and paths to the apps in the repository.
+"""
+import hashlib
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FLIGHT_DIR = os.path.join(REPO_DIR, "Flight Price Prediction")
+GENDER_DIR = os.path.join(REPO_DIR, "Gender Classification Model")
+TRAVEL_DIR = os.path.join(REPO_DIR, "Travel Recommendation Model")
+
+CITIES = ["Florianopolis (SC)", "Sao Paulo (SP)", "Salvador (BH)", "Brasilia (DF)", "Rio de Janeiro (RJ)",
+          "Campo Grande (MS)", "Aracaju (SE)", "Natal (RN)", "Recife (PE)"]
+FLIGHT_TYPES = {"economic": 1.0, "premium": 1.6, "firstClass": 2.3}
+AGENCIES = ["Rainbow", "CloudFy", "FlyingDrops"]
+
+
+def add_path(folder):
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+
+
+def load_module(module_name, path):
+    """Import path under module_name (once), so same-named app.py files do not collide."""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    add_path(os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_flights(n_rows, seed=0):
+    """Flights with the columns of flights.csv and a price driven by distance and class."""
+    rng = np.random.default_rng(seed)
+    origin = rng.integers(len(CITIES), size=n_rows)
+    destination = (origin + rng.integers(1, len(CITIES), size=n_rows)) % len(CITIES)
+    flight_type = rng.integers(len(FLIGHT_TYPES), size=n_rows)
+    distance = np.round(300 + 150 * np.abs(origin - destination) + rng.uniform(0, 200, n_rows), 2)
+    price = distance * 0.9 * np.array(list(FLIGHT_TYPES.values()))[flight_type] + rng.normal(0, 40, n_rows)
+    dates = pd.Timestamp("2019-09-26") + pd.to_timedelta(rng.integers(0, 1300, size=n_rows), unit="D")
+
+    return pd.DataFrame({
+        "travelCode": np.arange(n_rows),
+        "userCode": rng.integers(0, max(1, n_rows // 10), size=n_rows),
+        "from": np.array(CITIES)[origin],
+        "to": np.array(CITIES)[destination],
+        "flightType": np.array(list(FLIGHT_TYPES))[flight_type],
+        "price": np.round(price.clip(100), 2),
+        "time": np.round(distance / 550, 2),
+        "distance": distance,
+        "agency": np.array(AGENCIES)[rng.integers(len(AGENCIES), size=n_rows)],
+        "date": dates.strftime("%m/%d/%Y"),
+    })
+
+
+class HashingEncoder:
+    """
+    Stand-in for the SentenceTransformer with the same encode() interface and
+    output size: a deterministic unit vector per text, seeded from its hash.
+    """
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(text) for text in texts])
+
+
+def gender_artifacts(encoder, n_names=2000, n_components=23, seed=0):
+    """Fit PCA, scaler and classifier the way train_gender_model.py does, on random travellers."""
+    from sklearn.decomposition import PCA
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(seed)
+    names = [f"Traveller {i}" for i in range(n_names)]
+    pca = PCA(n_components=n_components, random_state=seed).fit(encoder.encode(names))
+    features = np.hstack([pca.transform(encoder.encode(names)),
+                          rng.integers(0, 1000, (n_names, 1)), np.zeros((n_names, 1)), rng.integers(18, 80, (n_names, 1))])
+    scaler = StandardScaler().fit(features)
+    classifier = LogisticRegression(max_iter=500).fit(scaler.transform(features), rng.integers(0, 2, n_names))
+    return {"encoder": encoder, "pca": pca, "scaler": scaler, "classifier": classifier}
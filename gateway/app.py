@@ -0,0 +1,167 @@
+"""
+Unified inference gateway: the flight price predictor, gender classifier and
+hotel recommender API served by one process and one HTTP server.
+
+    /flight/   -> Flight Price Prediction/app.py
+    /gender/   -> Gender Classification Model/app.py
+    /travel/   -> Travel Recommendation Model/service.py
+    /stats     -> per-model queue counters and process memory
+
+Each app is imported once under its own module name, so the three share one
+interpreter and one copy of NumPy, pandas and scikit-learn. Requests are
+handled by a shared pool of worker threads, and every model sits behind its
+own ConcurrencyLimiter (limits.py) so a slow transformer call can only queue
+behind other gender requests.
+
+Run from the repository root:
+    python gateway/app.py --port 9000 --workers 16
+"""
+import argparse
+import importlib.util
+import os
+import resource
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, jsonify
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from werkzeug.serving import BaseWSGIServer
+
+from limits import ConcurrencyLimiter
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# mount point -> (module name, app file, concurrency limit, queue length)
+MODELS = {
+    "flight": ("flight_app", os.path.join("Flight Price Prediction", "app.py"), 6, 6),
+    "gender": ("gender_app", os.path.join("Gender Classification Model", "app.py"), 2, 4),
+    "travel": ("travel_service", os.path.join("Travel Recommendation Model", "service.py"), 6, 6),
+}
+
+
+def load_app(module_name, app_file):
+    """Import the Flask app defined in app_file as module_name and return it."""
+    path = os.path.join(REPO_DIR, app_file)
+    folder = os.path.dirname(path)
+    # The apps import their sibling modules (startup, recommender, ...) by plain name
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module  # Flask finds templates through the module's file
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def unavailable_app(name, error):
+    """Stand-in for a model whose app failed to import (e.g. no trained .pkl files)."""
+    message = f"{name} model is unavailable: {error}".encode()
+
+    def app(environ, start_response):
+        start_response("503 Service Unavailable", [("Content-Type", "text/plain; charset=utf-8"),
+                                                   ("Content-Length", str(len(message)))])
+        return [message]
+    return app
+
+
+def memory_rss_mb():
+    """Resident memory of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def create_gateway(models=MODELS, names=None):
+    """Load the selected models and return (wsgi app, {name: limiter}, {name: load error})."""
+    limiters, errors = {}, {}
+    for name in names or models:
+        module_name, app_file, limit, max_queue = models[name]
+        print(f"🔄 Loading {name} from {app_file}...")
+        try:
+            app = load_app(module_name, app_file)
+        except Exception as e:
+            traceback.print_exc()
+            errors[name] = f"{type(e).__name__}: {e}"
+            app = unavailable_app(name, errors[name])
+        limiters[name] = ConcurrencyLimiter(app, name, limit, max_queue)
+
+    index = Flask(__name__)
+
+    @index.route('/')
+    def home():
+        return jsonify({
+            "models": {name: f"/{name}/" for name in limiters},
+            "unavailable": errors,
+        })
+
+    @index.route('/healthz')
+    def healthz():
+        return jsonify({"status": "ok"}), 200
+
+    @index.route('/stats')
+    def stats():
+        return jsonify({
+            "memory_rss_mb": round(memory_rss_mb(), 1),
+            "models": {name: limiter.stats() for name, limiter in limiters.items()},
+        })
+
+    mounts = {f"/{name}": limiter for name, limiter in limiters.items()}
+    return DispatcherMiddleware(index, mounts), limiters, errors
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug's WSGI server with connections handled by a fixed thread pool."""
+
+    def __init__(self, host, port, app, workers):
+        super().__init__(host, port, app)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gateway")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve all three models from one process")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--workers', type=int, default=16, help='Shared worker threads')
+    parser.add_argument('--models', nargs='+', choices=sorted(MODELS), help='Mount only these models')
+    return parser.parse_args()
+
+
+def main(args):
+    app, limiters, errors = create_gateway(names=args.models)
+    for name, limiter in limiters.items():
+        if limiter.limit + limiter.max_queue >= args.workers:
+            print(f"⚠️  {name}: limit + queue ({limiter.limit + limiter.max_queue}) can occupy every "
+                  f"one of the {args.workers} workers")
+    print(f"💾 Memory after loading: {memory_rss_mb():.0f} MB")
+    if errors:
+        print(f"⚠️  Unavailable: {', '.join(errors)}")
+
+    server = PooledWSGIServer(args.host, args.port, app, args.workers)
+    print(f"🚀 Gateway on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,83 @@
+"""
+Per-model concurrency limits for the gateway.
+
+Every mounted model gets its own ConcurrencyLimiter: at most `limit` requests
+run inside the model at once and at most `max_queue` more wait for a slot.
+Anything beyond that, or a request that waits longer than `timeout` seconds,
+is answered straight away with 503 and a Retry-After header. Waiting
+requests hold a thread of the shared pool, so limit + max_queue of every
+model should stay below the pool size; that way a slow model can fill its
+own queue but never every worker thread.
+"""
+import json
+import threading
+
+from werkzeug.wsgi import ClosingIterator
+
+
+class ConcurrencyLimiter:
+    def __init__(self, app, name, limit, max_queue, timeout=10.0):
+        self.app = app
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "served": self.served,
+                "rejected": self.rejected,
+            }
+
+    def _reject(self, start_response, reason):
+        with self._lock:
+            self.rejected += 1
+        body = json.dumps({"error": f"{self.name} is busy ({reason}), please retry"}).encode()
+        start_response("503 Service Unavailable", [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("Retry-After", "1"),
+        ])
+        return [body]
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+            self.served += 1
+        self._slots.release()
+
+    def __call__(self, environ, start_response):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                queue_full = self.waiting >= self.max_queue
+                if not queue_full:
+                    self.waiting += 1
+            if queue_full:
+                return self._reject(start_response, "queue full")
+            acquired = self._slots.acquire(timeout=self.timeout)
+            with self._lock:
+                self.waiting -= 1
+            if not acquired:
+                return self._reject(start_response, "queue timeout")
+
+        with self._lock:
+            self.active += 1
+        try:
+            app_iter = self.app(environ, start_response)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the response body has been sent
+        return ClosingIterator(app_iter, [self._release])
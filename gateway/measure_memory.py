@@ -0,0 +1,55 @@
+"""
+Compare the memory of one gateway process against three separate servers.
+
+Each model is loaded in a fresh interpreter on its own (what running the
+three apps separately costs), then all three together in one interpreter
+(the gateway). The gender model's background load is awaited before
+measuring.
+
+Usage (from the repository root):
+    python gateway/measure_memory.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+from app import MODELS
+
+GATEWAY_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import json, sys
+sys.path.insert(0, {gateway_dir!r})
+from app import create_gateway, memory_rss_mb
+_, _, errors = create_gateway(names={names!r})
+gender = sys.modules.get("gender_app")
+if gender is not None:
+    gender.startup.wait(timeout=300)
+print(json.dumps({{"rss_mb": memory_rss_mb(), "errors": errors}}))
+"""
+
+
+def measure(names):
+    code = CHILD.format(gateway_dir=GATEWAY_DIR, names=list(names))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print("💾 Resident memory after loading (MB):")
+    separate = 0.0
+    for name in MODELS:
+        result = measure([name])
+        separate += result["rss_mb"]
+        note = f"   (unavailable: {result['errors'][name]})" if result["errors"] else ""
+        print(f"   {name:<20} {result['rss_mb']:8.1f}{note}")
+
+    gateway = measure(list(MODELS))["rss_mb"]
+    print(f"   {'three servers':<20} {separate:8.1f}")
+    print(f"   {'one gateway':<20} {gateway:8.1f}   ({separate - gateway:.1f} MB saved, "
+          f"{1 - gateway / separate:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Helpers shared by the Flask apps of the three projects.
+
+The package lives at the repository root; each app adds the root to
+sys.path before importing it (and the Docker image copies it next to app.py).
+"""
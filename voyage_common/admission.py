@@ -0,0 +1,173 @@
+"""
+Admission control for the prediction routes of the Flask apps.
+
+install_admission() wraps app.wsgi_app in an AdmissionController, which lets
+at most ADMISSION_MAX_IN_FLIGHT requests run at once. A request arriving
+while every slot is busy is queued only if its expected wait (requests ahead
+of it times the recent service time, spread over the slots) fits in
+ADMISSION_QUEUE_BUDGET; otherwise, or if no slot frees up within that budget,
+it is rejected at once with 503 and a Retry-After header. Rejecting early
+keeps the latency of the admitted requests flat instead of letting every
+request wait behind a growing queue.
+
+Each admitted request also gets a deadline (ADMISSION_DEADLINE seconds after
+it arrived). Threads cannot be interrupted, so handlers check it
+cooperatively: degraded(environ) is true when the service is saturated or
+little of the deadline is left, and the handler should then skip optional
+work such as chart rendering.
+
+    ADMISSION_MAX_IN_FLIGHT   concurrent requests (default 4, 0 disables)
+    ADMISSION_QUEUE_BUDGET    longest acceptable queue wait in seconds (default 0.5)
+    ADMISSION_DEADLINE        per-request deadline in seconds (default 2)
+
+Health and page routes are not limited; only the paths given to
+install_admission are.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+from werkzeug.wsgi import ClosingIterator
+
+DEADLINE_KEY = "voyage.deadline"
+DEGRADED_HEADER = ("X-Degraded", "1")
+
+
+def remaining(environ):
+    """Seconds left before the request's deadline (inf when it has none)."""
+    deadline = environ.get(DEADLINE_KEY)
+    return math.inf if deadline is None else deadline - time.monotonic()
+
+
+class AdmissionController:
+    """WSGI middleware enforcing an in-flight limit and a queueing budget on selected paths."""
+
+    def __init__(self, wsgi_app, name, paths, max_in_flight=4, queue_budget=0.5, deadline=2.0,
+                 degrade_headroom=0.5, smoothing=0.2):
+        self.wsgi_app = wsgi_app
+        self.name = name
+        self.paths = frozenset(paths)
+        self.max_in_flight = max_in_flight
+        self.queue_budget = queue_budget
+        self.deadline = deadline
+        # Degrade once less than this fraction of the deadline is left
+        self.degrade_headroom = degrade_headroom
+        self.smoothing = smoothing
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.service_time = 0.0  # exponentially weighted mean of handler seconds
+        self.served = 0
+        self.rejected = 0
+        self.degraded_responses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "queue_budget": self.queue_budget,
+                "deadline": self.deadline,
+                "active": self.active,
+                "waiting": self.waiting,
+                "service_time_ms": round(self.service_time * 1000, 1),
+                "served": self.served,
+                "rejected": self.rejected,
+                "degraded": self.degraded_responses,
+            }
+
+    def expected_wait(self, ahead):
+        """Estimated queue wait for a request with `ahead` requests queued before it."""
+        return (ahead + 1) * self.service_time / self.max_in_flight
+
+    def saturated(self):
+        return self.waiting > 0 or self.active >= self.max_in_flight
+
+    def degraded(self, environ):
+        """True when the handler should skip optional work for this request."""
+        left = remaining(environ)
+        if self.saturated() or left < self.degrade_headroom * self.deadline:
+            with self._lock:
+                self.degraded_responses += 1
+            return True
+        return False
+
+    def _reject(self, environ, start_response, reason, retry_after):
+        with self._lock:
+            self.rejected += 1
+        message = f"{self.name} is busy ({reason}), please retry in {retry_after}s"
+        if "application/json" in environ.get("HTTP_ACCEPT", ""):
+            body, content_type = json.dumps({"error": message}).encode(), "application/json"
+        else:
+            body, content_type = f"<h2>Service busy</h2><p>{message}</p>".encode(), "text/html; charset=utf-8"
+        start_response("503 Service Unavailable", [
+            ("Content-Type", content_type),
+            ("Content-Length", str(len(body))),
+            ("Retry-After", str(retry_after)),
+        ])
+        return [body]
+
+    def _retry_after(self):
+        return max(1, math.ceil(self.expected_wait(self.waiting)))
+
+    def _finish(self, started):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.active -= 1
+            self.served += 1
+            self.service_time += self.smoothing * (elapsed - self.service_time)
+        self._slots.release()
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") not in self.paths:
+            return self.wsgi_app(environ, start_response)
+
+        arrived = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                over_budget = self.expected_wait(self.waiting) > self.queue_budget
+                if not over_budget:
+                    self.waiting += 1
+            if over_budget:
+                return self._reject(environ, start_response, "queue over latency budget", self._retry_after())
+            acquired = self._slots.acquire(timeout=self.queue_budget)
+            with self._lock:
+                self.waiting -= 1
+            if not acquired:
+                return self._reject(environ, start_response, "queue timeout", self._retry_after())
+
+        started = time.monotonic()
+        with self._lock:
+            self.active += 1
+        environ[DEADLINE_KEY] = arrived + self.deadline
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self._finish(started)
+            raise
+        # The slot is held until the response body has been sent
+        return ClosingIterator(app_iter, [lambda: self._finish(started)])
+
+
+def install_admission(app, name, paths):
+    """
+    Wrap app.wsgi_app in an AdmissionController configured from the environment.
+    Returns the controller, or None when ADMISSION_MAX_IN_FLIGHT is 0.
+    """
+    max_in_flight = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "4"))
+    if max_in_flight <= 0:
+        return None
+
+    controller = AdmissionController(
+        app.wsgi_app,
+        name=name,
+        paths=paths,
+        max_in_flight=max_in_flight,
+        queue_budget=float(os.environ.get("ADMISSION_QUEUE_BUDGET", "0.5")),
+        deadline=float(os.environ.get("ADMISSION_DEADLINE", "2")),
+    )
+    app.wsgi_app = controller
+    return controller
@@ -0,0 +1,367 @@
+"""
+Bounded-memory statistics of live prediction traffic, for drift checks.
+
+A TrafficMonitor keeps one streaming sketch per monitored feature, with a
+fixed size and a constant update cost per request:
+
+    categorical  a count-min sketch (depth x width counters, one hash per
+                 value) plus a table of the `heavy_hitters` most frequent
+                 values, so unseen categories show up by name
+    numeric      a histogram over fixed bin edges, taken from the reference
+                 profile so both sides bin identically, and the running
+                 count/mean/std/min/max
+
+Every worker process writes its snapshot to MONITOR_DIR every
+MONITOR_FLUSH_SECONDS; report() merges the snapshots of all live workers
+(sketch counters and histograms simply add up) and compares the result with
+the reference profile that training wrote next to the model
+(build_reference / save_reference), using the population stability index
+(PSI) per feature: below 0.1 is stable, above 0.2 is drift.
+
+    MONITOR_ENABLED         0 turns monitoring off (default 1)
+    MONITOR_DIR             snapshot directory shared by the workers of one app
+    MONITOR_FLUSH_SECONDS   seconds between snapshots (default 10)
+"""
+import bisect
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+from voyage_common.shadow import RunningStats
+
+REFERENCE_FILE = "monitor_reference.json"
+PSI_WATCH = 0.1
+PSI_DRIFT = 0.2
+OTHER = "__other__"
+
+
+class CountMinSketch:
+    """depth x width counters; estimate() never undercounts and overcounts by about total * e / width."""
+
+    def __init__(self, width=1024, depth=4, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table or [[0] * width for _ in range(depth)]
+
+    def _columns(self, value):
+        # One stable hash (not hash(), which is salted per process) split into two for double hashing
+        digest = hashlib.blake2b(str(value).encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, value, count=1):
+        estimate = math.inf
+        for row, column in zip(self.table, self._columns(value)):
+            row[column] += count
+            estimate = min(estimate, row[column])
+        return estimate
+
+    def estimate(self, value):
+        return min(row[column] for row, column in zip(self.table, self._columns(value)))
+
+    def merge(self, table):
+        for row, other in zip(self.table, table):
+            for column, count in enumerate(other):
+                row[column] += count
+
+
+class CategoricalSketch:
+    def __init__(self, width=1024, depth=4, heavy_hitters=32):
+        self.sketch = CountMinSketch(width, depth)
+        self.capacity = heavy_hitters
+        self.heavy = {}
+        self.count = 0
+        self._floor = 0  # a lower bound of the smallest heavy-hitter count
+
+    def add(self, value):
+        value = str(value)
+        self.count += 1
+        estimate = self.sketch.add(value)
+        if value in self.heavy or len(self.heavy) < self.capacity:
+            self.heavy[value] = estimate
+        elif estimate > self._floor:
+            # Only values that may displace a heavy hitter pay for the (capacity-bounded) scan
+            smallest = min(self.heavy, key=self.heavy.get)
+            if estimate > self.heavy[smallest]:
+                del self.heavy[smallest]
+                self.heavy[value] = estimate
+            self._floor = min(self.heavy.values())
+
+    def state(self):
+        return {"kind": "categorical", "count": self.count, "width": self.sketch.width, "depth": self.sketch.depth,
+                "table": [list(row) for row in self.sketch.table], "heavy": dict(self.heavy)}
+
+    def merge(self, state):
+        self.count += state["count"]
+        self.sketch.merge(state["table"])
+        candidates = set(self.heavy) | set(state["heavy"])
+        estimates = {value: self.sketch.estimate(value) for value in candidates}
+        self.heavy = dict(sorted(estimates.items(), key=lambda item: -item[1])[:self.capacity])
+        self._floor = min(self.heavy.values(), default=0)
+
+    def share(self, value):
+        return min(self.sketch.estimate(value), self.count) / self.count if self.count else 0.0
+
+    def summary(self, reference=None, top=10):
+        summary = {"count": self.count,
+                   "top": [{"value": value, "share": round(self.share(value), 4)}
+                           for value in sorted(self.heavy, key=lambda v: -self.heavy[v])[:top]]}
+        if reference is not None and self.count:
+            expected = reference["shares"]
+            observed = {value: self.share(value) for value in expected if value != OTHER}
+            observed[OTHER] = max(0.0, 1.0 - sum(observed.values()))
+            summary["psi"] = round(psi([expected.get(v, 0.0) for v in observed], list(observed.values())), 4)
+            summary["unseen"] = [value for value in self.heavy if value not in expected][:top]
+        return summary
+
+
+class NumericSketch:
+    def __init__(self, edges):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.stats = RunningStats()
+
+    def add(self, value):
+        value = float(value)
+        self.counts[bisect.bisect_right(self.edges, value)] += 1
+        self.stats.add(value)
+
+    def state(self):
+        return {"kind": "numeric", "edges": self.edges, "counts": list(self.counts), "stats": self.stats.state()}
+
+    def merge(self, state):
+        if state["edges"] != self.edges:
+            raise ValueError("histograms with different bin edges cannot be merged")
+        self.counts = [a + b for a, b in zip(self.counts, state["counts"])]
+        self.stats.merge(state["stats"])
+
+    def quantile(self, q):
+        """Upper edge of the bin holding the q-quantile (the maximum for the last bin)."""
+        rank, seen = q * self.stats.count, 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.edges[i] if i < len(self.edges) else self.stats.max
+
+    def summary(self, reference=None):
+        summary = self.stats.summary()
+        if self.stats.count:
+            summary.update({f"p{round(q * 100)}": round(self.quantile(q), 4) for q in (0.5, 0.95)})
+        if reference is not None and self.stats.count:
+            shares = [count / self.stats.count for count in self.counts]
+            summary["psi"] = round(psi(reference["shares"], shares), 4)
+            summary["reference_mean"] = reference["stats"]["mean"]
+        return summary
+
+
+def psi(expected, observed, floor=1e-4):
+    """Population stability index of two share vectors over the same bins."""
+    total = 0.0
+    for e, o in zip(expected, observed):
+        e, o = max(e, floor), max(o, floor)
+        total += (o - e) * math.log(o / e)
+    return total
+
+
+def _status(value):
+    if value is None:
+        return "no reference"
+    return "drift" if value >= PSI_DRIFT else "watch" if value >= PSI_WATCH else "stable"
+
+
+class TrafficMonitor:
+    """
+    Streaming sketches of the features passed to observe(). categorical is a
+    list of feature names, numeric maps names to default bin edges (replaced
+    by the reference profile's edges when there is one).
+    """
+
+    def __init__(self, name, categorical=(), numeric=None, reference=None, snapshot_dir=None,
+                 flush_interval=10.0, width=1024, depth=4, heavy_hitters=32):
+        self.name = name
+        self.reference = reference
+        self.snapshot_dir = snapshot_dir or os.path.join(tempfile.gettempdir(), f"voyage-monitor-{name}")
+        self.flush_interval = flush_interval
+        self._settings = (width, depth, heavy_hitters)
+        self._categorical = list(categorical)
+        self._numeric = {feature: (reference or {}).get("numeric", {}).get(feature, {}).get("edges", edges)
+                         for feature, edges in (numeric or {}).items()}
+        self._lock = threading.Lock()
+        self._reset()
+        self._pid = None
+
+    def _reset(self):
+        width, depth, heavy_hitters = self._settings
+        self.sketches = {feature: CategoricalSketch(width, depth, heavy_hitters) for feature in self._categorical}
+        self.sketches.update({feature: NumericSketch(edges) for feature, edges in self._numeric.items()})
+        self.observed = 0
+        self.started = time.time()
+
+    def observe(self, **values):
+        """Add one request; features not passed (or None) are skipped."""
+        if self._pid != os.getpid():
+            self._start_flusher()
+        with self._lock:
+            self.observed += 1
+            for feature, value in values.items():
+                sketch = self.sketches.get(feature)
+                if sketch is not None and value is not None:
+                    sketch.add(value)
+
+    def _start_flusher(self):
+        # Once per process: a forked worker starts from empty sketches and its own snapshot thread
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self._reset()
+            self._pid = os.getpid()
+        if self.flush_interval > 0:
+            threading.Thread(target=self._flush_loop, name=f"{self.name}-monitor", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️  Monitor snapshot failed: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            return {"app": self.name, "pid": os.getpid(), "started": self.started, "updated": time.time(),
+                    "observed": self.observed,
+                    "features": {feature: sketch.state() for feature, sketch in self.sketches.items()}}
+
+    def flush(self):
+        """Write this worker's snapshot atomically to snapshot_dir."""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def worker_snapshots(self):
+        """Own snapshot plus those of other workers updated recently (stale files belong to exited workers)."""
+        snapshots = [self.snapshot()]
+        if not os.path.isdir(self.snapshot_dir):
+            return snapshots
+        max_age = max(5 * self.flush_interval, 30)
+        for name in os.listdir(self.snapshot_dir):
+            path = os.path.join(self.snapshot_dir, name)
+            if not name.endswith(".json") or name == f"{os.getpid()}.json":
+                continue
+            try:
+                if time.time() - os.path.getmtime(path) > max_age:
+                    continue
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # replaced or removed while reading
+        return snapshots
+
+    def merged(self):
+        """A TrafficMonitor-like aggregate of every live worker's sketches."""
+        total = TrafficMonitor(self.name, self._categorical, self._numeric, self.reference, flush_interval=0,
+                               width=self._settings[0], depth=self._settings[1],
+                               heavy_hitters=self._settings[2])
+        workers = skipped = 0
+        for snapshot in self.worker_snapshots():
+            try:
+                for feature, state in snapshot["features"].items():
+                    if feature in total.sketches:
+                        total.sketches[feature].merge(state)
+            except (KeyError, ValueError):
+                skipped += 1  # another model version or sketch size
+                continue
+            total.observed += snapshot["observed"]
+            total.started = min(total.started, snapshot["started"])
+            workers += 1
+        return total, workers, skipped
+
+    def report(self):
+        """Merged statistics of all workers, compared feature by feature with the reference profile."""
+        total, workers, skipped = self.merged()
+        reference = self.reference or {}
+        features = {}
+        for feature, sketch in total.sketches.items():
+            kind = "categorical" if isinstance(sketch, CategoricalSketch) else "numeric"
+            summary = sketch.summary(reference.get(kind, {}).get(feature))
+            summary["status"] = _status(summary.get("psi"))
+            features[feature] = summary
+        return {
+            "app": self.name,
+            "workers": workers,
+            "skipped_snapshots": skipped,
+            "observed": total.observed,
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(total.started)),
+            "reference": {"rows": reference.get("rows"), "created": reference.get("created")} if reference else None,
+            "drifting": sorted(f for f, summary in features.items() if summary["status"] == "drift"),
+            "features": features,
+        }
+
+
+def build_reference(frame, categorical=(), numeric=(), bins=10, top=100):
+    """
+    Reference profile of a training DataFrame: category shares (the top
+    values, the rest as __other__) and decile-binned numeric histograms.
+    """
+    import numpy as np
+
+    profile = {"rows": len(frame), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "categorical": {}, "numeric": {}}
+    for feature in categorical:
+        shares = frame[feature].astype(str).value_counts(normalize=True)
+        kept = {str(value): float(share) for value, share in shares.head(top).items()}
+        kept[OTHER] = max(0.0, 1.0 - sum(kept.values()))
+        profile["categorical"][feature] = {"shares": kept}
+    for feature in numeric:
+        values = frame[feature].to_numpy(dtype=float)
+        edges = [float(edge) for edge in np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))]
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        stats = RunningStats()
+        stats.merge({"count": len(values), "mean": float(values.mean()),
+                     "m2": float(((values - values.mean()) ** 2).sum()),
+                     "min": float(values.min()), "max": float(values.max())})
+        profile["numeric"][feature] = {"edges": edges, "shares": (counts / len(values)).tolist(),
+                                       "stats": stats.summary()}
+    return profile
+
+
+def save_reference(profile, path):
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=1)
+
+
+def load_reference(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def install_monitor(app, name, categorical=(), numeric=None, reference_path=None):
+    """
+    Create a TrafficMonitor configured from the environment and serve its
+    merged report at GET /monitor. Returns the monitor, or None when
+    MONITOR_ENABLED is 0.
+    """
+    if os.environ.get("MONITOR_ENABLED", "1") == "0":
+        return None
+    from flask import jsonify
+
+    reference = load_reference(reference_path) if reference_path else None
+    if reference_path and reference is None:
+        print(f"⚠️  No reference profile at {reference_path}: live traffic is monitored without drift scores")
+    monitor = TrafficMonitor(name, categorical, numeric, reference,
+                             snapshot_dir=os.environ.get("MONITOR_DIR"),
+                             flush_interval=float(os.environ.get("MONITOR_FLUSH_SECONDS", "10")))
+
+    @app.route("/monitor")
+    def monitor_report():
+        return jsonify(monitor.report())
+
+    return monitor
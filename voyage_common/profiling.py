@@ -0,0 +1,211 @@
+"""
+Opt-in request profiling for the Flask apps.
+
+install_profiler() wraps app.wsgi_app so that a sampled fraction of requests,
+or any request carrying the X-Profile header (when allowed), is profiled.
+Each profiled request writes to
+
+    <PROFILE_DIR>/<app>-<model version>/<route>/<timestamp>-<id>.collapsed
+                                                            .txt
+
+The .collapsed file is in the folded-stack format read by flamegraph.pl,
+speedscope and inferno ("outer;inner;leaf <samples>" per line); the .txt
+summary lists the wall time and the hottest functions. Two collectors exist:
+
+- "sampling" (default): a helper thread snapshots the request thread's stack
+  every PROFILE_INTERVAL seconds via sys._current_frames(), so the request
+  itself runs unmodified.
+- "cprofile": deterministic cProfile; writes a .prof file (pstats) with the
+  summary instead of collapsed stacks, at a much higher overhead.
+
+Configuration comes from the environment:
+
+    PROFILE_SAMPLE_RATE   fraction of requests to profile (default 0)
+    PROFILE_ALLOW_HEADER  1 to honour "X-Profile: 1" on any request (default 0)
+    PROFILE_MODE          sampling | cprofile
+    PROFILE_INTERVAL      sampling period in seconds (default 0.005)
+    PROFILE_DIR           output directory (default <app dir>/profiles)
+
+With a sample rate of 0 and the header disabled the app is not wrapped at
+all, so there is no overhead.
+"""
+import cProfile
+import hashlib
+import io
+import itertools
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+MODES = ("sampling", "cprofile")
+
+_request_ids = itertools.count(1)
+
+
+def model_version(paths):
+    """Short fingerprint of model files from their names, sizes and mtimes (no hashing of contents)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:10]
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Counts the stacks of one thread, sampled from a background thread.
+    Frames above root_code (the server and the profiler itself) are left out.
+    """
+
+    def __init__(self, thread_id, interval, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _sampling_summary(stacks, top=20):
+    self_samples, total_samples = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            total_samples[frame] += count
+    lines = [f"samples: {sum(stacks.values())}", "", "self   total  function"]
+    for frame, count in self_samples.most_common(top):
+        lines.append(f"{count:5d}  {total_samples[frame]:5d}  {frame}")
+    return "\n".join(lines)
+
+
+class RequestProfiler:
+    """WSGI middleware that profiles selected requests and writes the results to disk."""
+
+    def __init__(self, wsgi_app, output_dir, name, version, sample_rate=0.0, allow_header=False,
+                 mode="sampling", interval=0.005):
+        if mode not in MODES:
+            raise ValueError(f"PROFILE_MODE must be one of {MODES}, not {mode!r}")
+        self.wsgi_app = wsgi_app
+        self.output_dir = os.path.join(output_dir, f"{name}-{version}")
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+        self.mode = mode
+        self.interval = interval
+
+    def _selected(self, environ):
+        if self.allow_header and environ.get(PROFILE_HEADER, "") not in ("", "0"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _output_base(self, environ):
+        route = re.sub(r"[^A-Za-z0-9_.-]+", "_", environ.get("PATH_INFO", "/").strip("/")) or "index"
+        folder = os.path.join(self.output_dir, f"{environ.get('REQUEST_METHOD', 'GET')}_{route}")
+        os.makedirs(folder, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        return os.path.join(folder, f"{stamp}-{os.getpid()}-{next(_request_ids)}")
+
+    def __call__(self, environ, start_response):
+        if not self._selected(environ):
+            return self.wsgi_app(environ, start_response)
+
+        start = time.perf_counter()
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            response = profile.runcall(self._run, environ, start_response)
+            self._write_cprofile(environ, profile, time.perf_counter() - start)
+        else:
+            sampler = StackSampler(threading.get_ident(), self.interval, root_code=self._run.__code__)
+            sampler.start()
+            try:
+                response = self._run(environ, start_response)
+            finally:
+                sampler.stop()
+            self._write_sampling(environ, sampler.stacks, time.perf_counter() - start)
+        return response
+
+    def _run(self, environ, start_response):
+        # Consume the body inside the profiled region; Flask responses are buffered anyway
+        app_iter = self.wsgi_app(environ, start_response)
+        try:
+            return [b"".join(app_iter)]
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+    def _header(self, environ, elapsed):
+        return (f"route: {environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')}\n"
+                f"profiler: {self.mode}\n"
+                f"wall time: {elapsed * 1000:.1f} ms\n")
+
+    def _write_sampling(self, environ, stacks, elapsed):
+        base = self._output_base(environ)
+        with open(base + ".collapsed", "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+        with open(base + ".txt", "w") as f:
+            f.write(self._header(environ, elapsed) + f"interval: {self.interval * 1000:g} ms\n")
+            f.write(_sampling_summary(stacks) + "\n")
+
+    def _write_cprofile(self, environ, profile, elapsed):
+        base = self._output_base(environ)
+        profile.dump_stats(base + ".prof")
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(25)
+        with open(base + ".txt", "w") as f:
+            f.write(self._header(environ, elapsed) + summary.getvalue())
+
+
+def install_profiler(app, name, base_dir, model_files=()):
+    """
+    Wrap app.wsgi_app in a RequestProfiler configured from the environment.
+    Returns the profiler, or None when profiling is off (the app is untouched).
+    """
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    allow_header = os.environ.get("PROFILE_ALLOW_HEADER", "0") not in ("", "0")
+    if sample_rate <= 0 and not allow_header:
+        return None
+
+    profiler = RequestProfiler(
+        app.wsgi_app,
+        output_dir=os.environ.get("PROFILE_DIR", os.path.join(base_dir, "profiles")),
+        name=name,
+        version=model_version(model_files),
+        sample_rate=sample_rate,
+        allow_header=allow_header,
+        mode=os.environ.get("PROFILE_MODE", "sampling"),
+        interval=float(os.environ.get("PROFILE_INTERVAL", "0.005")),
+    )
+    app.wsgi_app = profiler
+    print(f"🔬 Profiling {sample_rate:.1%} of requests{' and X-Profile requests' if allow_header else ''} "
+          f"({profiler.mode}) into {profiler.output_dir}")
+    return profiler
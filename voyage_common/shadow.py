@@ -0,0 +1,274 @@
+"""
+Shadow evaluation of a candidate model on live traffic.
+
+A ShadowEvaluator receives a copy of each request's model input after the
+primary model has answered, and runs the candidate in a small pool of
+worker processes. The primary response never waits for it: mirror() only
+enqueues, and drops the work when the queue is full, when should_shed()
+says the service is under pressure, or when the request is not sampled.
+Processes rather than threads keep the candidate from holding the GIL while
+requests are served, and the workers run at a lower CPU priority, so the
+candidate only gets CPU time the live traffic does not need.
+
+Results are kept as streaming aggregates with constant memory: running
+mean/stddev/min/max of the prediction delta (candidate - primary) and of its
+absolute value, and latency histograms of both models, from which p50/p95/p99
+are read. The candidate's wall time includes waiting for CPU at its lower
+priority; its CPU time is the cost it would have as the live model.
+
+mirror() never raises into the request. When a worker process dies the pool
+is broken for good, so it is replaced; after MAX_POOL_RESTARTS replacements
+the candidate is considered broken and shadowing stops.
+"""
+import bisect
+import math
+import os
+import pickle
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+WORKER_NICENESS = 10
+MAX_POOL_RESTARTS = 3
+
+# The candidate of the current worker process, set by _init_worker
+_candidate = None
+
+
+class PickledModel:
+    """
+    A candidate stored as pickle files: an estimator and an optional scaler.
+    Calling it predicts one row. The files are loaded lazily, so only the
+    paths are sent to the worker processes.
+    """
+
+    def __init__(self, model_path, scaler_path=None):
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self._model = self._scaler = None
+
+    def __getstate__(self):
+        return {"model_path": self.model_path, "scaler_path": self.scaler_path}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _load(self):
+        with open(self.model_path, "rb") as f:
+            self._model = pickle.load(f)
+        # One thread per worker; parallelism comes from the pool size
+        if hasattr(self._model, "n_jobs"):
+            self._model.n_jobs = 1
+        if self.scaler_path:
+            with open(self.scaler_path, "rb") as f:
+                self._scaler = pickle.load(f)
+
+    def __call__(self, features):
+        if self._model is None:
+            self._load()
+        row = [list(features)]
+        if self._scaler is not None:
+            row = self._scaler.transform(row)
+        return self._model.predict(row)[0]
+
+
+def _init_worker(candidate):
+    global _candidate
+    _candidate = candidate
+    try:
+        os.nice(WORKER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+def _run_candidate(features):
+    start, start_cpu = time.perf_counter(), time.process_time()
+    prediction = float(_candidate(features))
+    return prediction, time.perf_counter() - start, time.process_time() - start_cpu
+
+
+class RunningStats:
+    """Count, mean, standard deviation, min and max, updated in O(1) (Welford)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def state(self):
+        return {"count": self.count, "mean": self.mean, "m2": self._m2, "min": self.min, "max": self.max}
+
+    def merge(self, state):
+        """Fold in the state() of another RunningStats (Chan et al.'s pairwise update)."""
+        if not state["count"]:
+            return
+        count = self.count + state["count"]
+        delta = state["mean"] - self.mean
+        self._m2 += state["m2"] + delta * delta * self.count * state["count"] / count
+        self.mean += delta * state["count"] / count
+        self.count = count
+        self.min = min(self.min, state["min"])
+        self.max = max(self.max, state["max"])
+
+    def summary(self, digits=4):
+        if not self.count:
+            return {"count": 0}
+        std = math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+        return {"count": self.count, "mean": round(self.mean, digits), "std": round(std, digits),
+                "min": round(self.min, digits), "max": round(self.max, digits)}
+
+
+class LatencyHistogram:
+    """Latencies in log-spaced buckets (about 10% wide, 0.01 ms to 100 s); quantiles are bucket upper bounds."""
+
+    BOUNDS_MS = [0.01 * 1.1 ** i for i in range(int(math.log(1e7) / math.log(1.1)) + 2)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, seconds * 1000)] += 1
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.BOUNDS_MS[min(i, len(self.BOUNDS_MS) - 1)]
+
+    def summary(self):
+        summary = {"count": self.count}
+        for q in (0.5, 0.95, 0.99):
+            value = self.quantile(q)
+            summary[f"p{round(q * 100)}_ms"] = None if value is None else round(value, 3)
+        return summary
+
+
+class ShadowEvaluator:
+    """
+    Runs candidate(features) in worker processes for mirrored requests and
+    compares it to the primary prediction. candidate must be picklable (see
+    PickledModel). should_shed is an optional callable; while it returns True
+    no shadow work is queued.
+    """
+
+    def __init__(self, name, candidate, workers=1, max_queue=32, sample_rate=1.0, should_shed=None):
+        self.name = name
+        self.max_queue = max_queue
+        self.sample_rate = sample_rate
+        self.should_shed = should_shed
+
+        self._candidate = candidate
+        self._workers = workers
+        self._pool = self._new_pool()
+        self.pool_restarts = 0
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.mirrored = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = {"queue_full": 0, "under_load": 0}
+        self.delta = RunningStats()
+        self.abs_delta = RunningStats()
+        self.primary_latency = LatencyHistogram()
+        self.candidate_latency = LatencyHistogram()
+        self.candidate_cpu = LatencyHistogram()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self._workers, initializer=_init_worker, initargs=(self._candidate,))
+
+    def _replace_pool(self, broken):
+        with self._lock:
+            if self._pool is not broken:
+                return  # Already replaced by another request
+            self.pool_restarts += 1
+            self._pool = self._new_pool() if self.pool_restarts <= MAX_POOL_RESTARTS else None
+        broken.shutdown(wait=False)
+
+    def mirror(self, features, primary, primary_seconds=None):
+        """Queue a comparison without blocking; returns False when the work was dropped or not sampled."""
+        pool = self._pool
+        if pool is None:
+            return False  # Shadowing stopped after repeated pool failures
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+        if self.should_shed is not None and self.should_shed():
+            with self._lock:
+                self.dropped["under_load"] += 1
+            return False
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.dropped["queue_full"] += 1
+                return False
+            self.pending += 1
+            self.mirrored += 1
+            if primary_seconds is not None:
+                self.primary_latency.add(primary_seconds)
+        try:
+            future = pool.submit(_run_candidate, [float(x) for x in features])
+            future.add_done_callback(lambda done: self._record(done, float(primary)))
+        except Exception as e:
+            with self._lock:
+                self.pending -= 1
+                self.mirrored -= 1
+                self.failed += 1
+            if isinstance(e, BrokenProcessPool):
+                self._replace_pool(pool)
+            return False
+        return True
+
+    def _record(self, future, primary):
+        try:
+            candidate, elapsed, cpu = future.result()
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+                self.failed += 1
+            return
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            self.delta.add(candidate - primary)
+            self.abs_delta.add(abs(candidate - primary))
+            self.candidate_latency.add(elapsed)
+            self.candidate_cpu.add(cpu)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "candidate": self.name,
+                "sample_rate": self.sample_rate,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "mirrored": self.mirrored,
+                "completed": self.completed,
+                "failed": self.failed,
+                "pool_restarts": self.pool_restarts,
+                "disabled": self._pool is None,
+                "dropped": dict(self.dropped),
+                "delta": self.delta.summary(),
+                "abs_delta": self.abs_delta.summary(),
+                "primary_latency": self.primary_latency.summary(),
+                "candidate_latency": self.candidate_latency.summary(),
+                "candidate_cpu": self.candidate_cpu.summary(),
+            }
+
+    def close(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
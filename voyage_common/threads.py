@@ -0,0 +1,135 @@
+"""
+Thread budgets for serving, training and tuning.
+
+Every entry point calls configure_threads(role) once at startup. The CPUs
+available to the process (affinity mask, capped by a cgroup CPU quota) are
+split across `workers` processes, and the share of each is spent according
+to the role:
+
+    serving   n_jobs=1: a single-row predict fanned out over joblib costs
+              more than it saves, and concurrency comes from the server's
+              workers. BLAS/OpenMP (and torch) get the worker's share.
+    training  one fit uses the worker's share, both as estimator n_jobs
+              and as BLAS threads (forests use joblib, ALS uses BLAS).
+    tuning    the search gets the worker's share as n_jobs; the estimators
+              inside it and BLAS get one thread each, so the two levels of
+              parallelism do not multiply.
+
+The BLAS/OpenMP limits are exported as environment variables (read by
+libraries loaded later, e.g. torch in the gender app, and by child
+processes) and applied to already-loaded libraries through threadpoolctl.
+Variables set explicitly by the operator are left alone. joblib's process
+backend is capped through LOKY_MAX_CPU_COUNT; its configuration API is
+thread-local, so n_jobs is set on the estimators instead (ThreadBudget.apply).
+
+    CPU_BUDGET        override the detected CPU count
+    WEB_CONCURRENCY   worker processes per host (default 1; gunicorn's convention)
+"""
+import math
+import os
+import sys
+
+ROLES = ("serving", "training", "tuning")
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS",
+                 "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def _cgroup_cpu_quota():
+    """CPU quota of the container in CPUs, or None when unlimited or unknown."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus():
+    """CPUs this process may use: the affinity mask, capped by the cgroup quota, or CPU_BUDGET."""
+    if os.environ.get("CPU_BUDGET"):
+        return max(1, int(os.environ["CPU_BUDGET"]))
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.floor(quota)))
+    return cpus
+
+
+class ThreadBudget:
+    def __init__(self, role, cpus, workers, n_jobs, inner_n_jobs, blas_threads):
+        self.role = role
+        self.cpus = cpus
+        self.workers = workers
+        self.n_jobs = n_jobs
+        self.inner_n_jobs = inner_n_jobs
+        self.blas_threads = blas_threads
+
+    def __repr__(self):
+        return (f"ThreadBudget(role={self.role!r}, cpus={self.cpus}, workers={self.workers}, "
+                f"n_jobs={self.n_jobs}, inner_n_jobs={self.inner_n_jobs}, blas_threads={self.blas_threads})")
+
+    def apply(self, estimator, _inner=False):
+        """
+        Set n_jobs on estimator (including models unpickled with n_jobs=-1)
+        and inner_n_jobs on the estimators nested in it (search, pipeline,
+        ensemble of estimators). Returns the estimator.
+        """
+        if hasattr(estimator, "n_jobs"):
+            estimator.n_jobs = self.inner_n_jobs if _inner else self.n_jobs
+        for attribute in ("estimator", "base_estimator", "best_estimator_"):
+            nested = getattr(estimator, attribute, None)
+            if nested is not None and hasattr(nested, "get_params"):
+                self.apply(nested, _inner=True)
+        for _, step in getattr(estimator, "steps", []):
+            if hasattr(step, "get_params"):
+                self.apply(step, _inner=_inner)
+        return estimator
+
+
+def _limit_native_threads(threads):
+    for name in BLAS_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=int(os.environ["OMP_NUM_THREADS"]))
+    except ImportError:
+        pass
+    # torch reads OMP_NUM_THREADS when it is first imported; adjust it if that already happened
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(int(os.environ["OMP_NUM_THREADS"]))
+
+
+def configure_threads(role, workers=None, verbose=True):
+    """Compute and apply the thread budget of this process; returns the ThreadBudget."""
+    if role not in ROLES:
+        raise ValueError(f"role must be one of {ROLES}, not {role!r}")
+    workers = max(1, workers or int(os.environ.get("WEB_CONCURRENCY", "1")))
+    cpus = available_cpus()
+    share = max(1, cpus // workers)
+
+    if role == "serving":
+        budget = ThreadBudget(role, cpus, workers, n_jobs=1, inner_n_jobs=1, blas_threads=share)
+    elif role == "training":
+        budget = ThreadBudget(role, cpus, workers, n_jobs=share, inner_n_jobs=1, blas_threads=share)
+    else:
+        budget = ThreadBudget(role, cpus, workers, n_jobs=share, inner_n_jobs=1, blas_threads=1)
+
+    _limit_native_threads(budget.blas_threads)
+    os.environ.setdefault("LOKY_MAX_CPU_COUNT", str(share))
+    if verbose:
+        print(f"🧵 Thread budget ({role}): {cpus} CPUs / {workers} worker(s) → n_jobs={budget.n_jobs}, "
+              f"BLAS threads={os.environ['OMP_NUM_THREADS']}")
+    return budget
@@ -0,0 +1,371 @@
+"""
+Buffered, non-blocking experiment tracking.
+
+ExperimentTracker is a small MLflow front end for the training scripts and
+the DAG. log_param/log_metric/stage() only append to an in-memory buffer; a
+background thread sends the buffer to the tracking server with batched
+log_batch calls every few seconds, and uploads artifacts and models (saving
+a model happens in that thread too), so training never waits on the server.
+
+When no tracking URI is configured, mlflow is not installed, or the server
+fails, the run continues offline: everything is appended to a local spool
+(<spool dir>/<run>/events.jsonl plus copied artifacts) and sent later with
+
+    python -m voyage_common.tracking replay [--spool-dir DIR] [--tracking-uri URI]
+
+Replay is resumable: each run records how many events were delivered.
+
+    MLFLOW_TRACKING_URI   tracking server (unset: spool only)
+    TRACKING_SPOOL_DIR    spool directory (default ./tracking-spool)
+"""
+import argparse
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+MAX_PARAMS_PER_BATCH = 100
+MAX_METRICS_PER_BATCH = 1000
+DEFAULT_SPOOL_DIR = "tracking-spool"
+# A missing server should fail fast in the background thread, not retry for minutes
+HTTP_SETTINGS = {"MLFLOW_HTTP_REQUEST_MAX_RETRIES": "0", "MLFLOW_HTTP_REQUEST_TIMEOUT": "10"}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _client(tracking_uri):
+    for name, value in HTTP_SETTINGS.items():
+        os.environ.setdefault(name, value)
+    from mlflow.tracking import MlflowClient
+    return MlflowClient(tracking_uri)
+
+
+def _experiment_id(client, name):
+    experiment = client.get_experiment_by_name(name)
+    return experiment.experiment_id if experiment else client.create_experiment(name)
+
+
+def _log_batch(client, run_id, params, metrics, tags):
+    """
+    log_batch within MLflow's per-request limits; metrics are (key, value,
+    timestamp_ms, step). What was sent is removed from params, metrics and
+    tags, so after a failure they hold exactly what is left to send.
+    """
+    from mlflow.entities import Metric, Param, RunTag
+
+    while params or tags:
+        keys = list(params)[:MAX_PARAMS_PER_BATCH]
+        client.log_batch(run_id, params=[Param(key, str(params[key])) for key in keys],
+                         tags=[RunTag(key, str(value)) for key, value in tags.items()])
+        for key in keys:
+            del params[key]
+        tags.clear()
+    while metrics:
+        chunk = metrics[:MAX_METRICS_PER_BATCH]
+        client.log_batch(run_id, metrics=[Metric(key, float(value), timestamp, step)
+                                          for key, value, timestamp, step in chunk])
+        del metrics[:len(chunk)]
+
+
+def _save_model(model, path):
+    """An MLflow sklearn model directory when mlflow is available, else a pickle in path."""
+    try:
+        import mlflow.sklearn
+        mlflow.sklearn.save_model(model, path)
+    except ImportError:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "model.pkl"), "wb") as f:
+            pickle.dump(model, f)
+
+
+class ExperimentTracker:
+    """
+    One tracked run. Use as a context manager, or call close() at the end;
+    close() waits (up to a timeout) for the buffer to be sent or spooled.
+    """
+
+    def __init__(self, experiment, run_name=None, tracking_uri=None, spool_dir=None, tags=None,
+                 flush_interval=5.0):
+        self.experiment = experiment
+        self.run_name = run_name or f"{experiment}-{time.strftime('%Y%m%dT%H%M%S')}"
+        self.tracking_uri = tracking_uri or os.environ.get("MLFLOW_TRACKING_URI")
+        self.spool_dir = os.path.join(spool_dir or os.environ.get("TRACKING_SPOOL_DIR", DEFAULT_SPOOL_DIR),
+                                      f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}")
+        self.flush_interval = flush_interval
+        self.start_ms = _now_ms()
+
+        self.client = None
+        self.run_id = None
+        self.offline = self.tracking_uri is None
+        self.offline_reason = "no tracking URI" if self.offline else None
+
+        self._lock = threading.Lock()
+        self._params = {}
+        self._metrics = []
+        self._tags = dict(tags or {})
+        self._artifacts = []
+        self._status = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tracking-flush", daemon=True)
+        self._thread.start()
+
+    # --- buffering (called from the training code; never blocks on the server)
+
+    def log_param(self, key, value):
+        with self._lock:
+            self._params[key] = value
+
+    def log_params(self, params):
+        with self._lock:
+            self._params.update(params)
+
+    def log_metric(self, key, value, step=0):
+        with self._lock:
+            self._metrics.append((key, float(value), _now_ms(), step))
+
+    def log_metrics(self, metrics, step=0):
+        timestamp = _now_ms()
+        with self._lock:
+            self._metrics.extend((key, float(value), timestamp, step) for key, value in metrics.items())
+
+    def set_tag(self, key, value):
+        with self._lock:
+            self._tags[key] = value
+
+    def log_stage(self, name, seconds):
+        self.log_metric(f"stage_seconds/{name}", seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of the pipeline as the metric stage_seconds/<name>."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.log_stage(name, time.perf_counter() - start)
+
+    def log_artifact(self, path, artifact_path=None):
+        with self._lock:
+            self._artifacts.append(("file", path, artifact_path))
+        self._wake.set()
+
+    def log_model(self, model, artifact_path="model"):
+        """Save and upload model in the background; the model must not be modified afterwards."""
+        with self._lock:
+            self._artifacts.append(("model", model, artifact_path))
+        self._wake.set()
+
+    # --- background thread
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush()
+        self._flush()
+        self._finish()
+
+    def _go_offline(self, error):
+        self.offline = True
+        self.offline_reason = f"{type(error).__name__}: {error}"
+        print(f"⚠️  Tracking server unavailable ({self.offline_reason}); spooling to {self.spool_dir}")
+
+    def _ensure_run(self):
+        if self.run_id is None:
+            self.client = _client(self.tracking_uri)
+            run = self.client.create_run(_experiment_id(self.client, self.experiment), start_time=self.start_ms,
+                                         run_name=self.run_name)
+            self.run_id = run.info.run_id
+
+    def _flush(self):
+        with self._lock:
+            params, self._params = self._params, {}
+            metrics, self._metrics = self._metrics, []
+            tags, self._tags = self._tags, {}
+            artifacts, self._artifacts = self._artifacts, []
+        if not (params or metrics or tags or artifacts):
+            return
+
+        if not self.offline and (params or metrics or tags):
+            try:
+                self._ensure_run()
+                _log_batch(self.client, self.run_id, params, metrics, tags)
+            except Exception as error:
+                self._go_offline(error)
+        while artifacts and not self.offline:
+            try:
+                self._ensure_run()
+                self._upload(artifacts[0])
+                artifacts.pop(0)
+            except Exception as error:
+                self._go_offline(error)
+        self._spool(params, metrics, tags, artifacts)
+
+    def _upload(self, artifact):
+        kind, source, artifact_path = artifact
+        if kind == "file":
+            self.client.log_artifact(self.run_id, source, artifact_path)
+            return
+        local = os.path.join(self.spool_dir, "staging", artifact_path or "model")
+        _save_model(source, local)
+        try:
+            self.client.log_artifacts(self.run_id, local, artifact_path)
+        finally:
+            shutil.rmtree(os.path.dirname(local), ignore_errors=True)
+
+    def _finish(self):
+        status = self._status or "FINISHED"
+        if not self.offline:
+            try:
+                self._ensure_run()
+                self.client.set_terminated(self.run_id, status)
+                return
+            except Exception as error:
+                self._go_offline(error)
+        self._spool_events([{"end": status, "end_ms": _now_ms()}])
+
+    # --- local spool
+
+    def _spool(self, params, metrics, tags, artifacts):
+        events = []
+        if params:
+            events.append({"params": {key: str(value) for key, value in params.items()}})
+        if tags:
+            events.append({"tags": {key: str(value) for key, value in tags.items()}})
+        if metrics:
+            events.append({"metrics": [list(metric) for metric in metrics]})
+        for kind, source, artifact_path in artifacts:
+            local = os.path.join(self.spool_dir, "artifacts", uuid.uuid4().hex[:8])
+            if kind == "file":
+                os.makedirs(local, exist_ok=True)
+                shutil.copy2(source, local)
+            else:
+                _save_model(source, local)
+            events.append({"artifact": {"local": os.path.relpath(local, self.spool_dir),
+                                        "artifact_path": artifact_path, "kind": kind}})
+        if events:
+            self._spool_events(events)
+
+    def _spool_events(self, events):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        meta_path = os.path.join(self.spool_dir, "run.json")
+        if not os.path.exists(meta_path):
+            with open(meta_path, "w") as f:
+                # A run already created on the server is continued on replay
+                json.dump({"experiment": self.experiment, "run_name": self.run_name, "start_ms": self.start_ms,
+                           "run_id": self.run_id, "reason": self.offline_reason}, f)
+        with open(os.path.join(self.spool_dir, "events.jsonl"), "a") as f:
+            f.writelines(json.dumps(event) + "\n" for event in events)
+
+    # --- end of run
+
+    def close(self, status="FINISHED", timeout=60.0):
+        """Flush everything and end the run; returns False if the thread was still busy after timeout."""
+        self._status = status
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠️  Tracking still flushing after {timeout:.0f}s; it continues in the background")
+            return False
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close("FAILED" if exc_type else "FINISHED")
+
+
+def spooled_runs(spool_dir=None):
+    spool_dir = spool_dir or os.environ.get("TRACKING_SPOOL_DIR", DEFAULT_SPOOL_DIR)
+    if not os.path.isdir(spool_dir):
+        return []
+    return sorted(os.path.join(spool_dir, name) for name in os.listdir(spool_dir)
+                  if os.path.exists(os.path.join(spool_dir, name, "run.json")))
+
+
+def replay_run(run_dir, client):
+    """Send one spooled run, resuming after the last delivered event; the directory is removed when done."""
+    with open(os.path.join(run_dir, "run.json")) as f:
+        meta = json.load(f)
+    progress_path = os.path.join(run_dir, "replayed")
+    done = int(open(progress_path).read()) if os.path.exists(progress_path) else 0
+
+    if not meta.get("run_id"):
+        run = client.create_run(_experiment_id(client, meta["experiment"]), start_time=meta["start_ms"],
+                                run_name=meta["run_name"])
+        meta["run_id"] = run.info.run_id
+        with open(os.path.join(run_dir, "run.json"), "w") as f:
+            json.dump(meta, f)
+    run_id = meta["run_id"]
+
+    with open(os.path.join(run_dir, "events.jsonl")) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    for number, event in enumerate(events[done:], start=done + 1):
+        if "params" in event or "tags" in event or "metrics" in event:
+            _log_batch(client, run_id, event.get("params", {}), event.get("metrics", []), event.get("tags", {}))
+        elif "artifact" in event:
+            artifact = event["artifact"]
+            local = os.path.join(run_dir, artifact["local"])
+            if artifact["kind"] == "model":
+                client.log_artifacts(run_id, local, artifact["artifact_path"])
+            else:
+                for name in os.listdir(local):
+                    client.log_artifact(run_id, os.path.join(local, name), artifact["artifact_path"])
+        elif "end" in event:
+            client.set_terminated(run_id, event["end"], end_time=event["end_ms"])
+        with open(progress_path, "w") as f:
+            f.write(str(number))
+    shutil.rmtree(run_dir)
+    return run_id
+
+
+def replay(spool_dir=None, tracking_uri=None):
+    """Replay every spooled run; returns (replayed, failed) counts."""
+    tracking_uri = tracking_uri or os.environ.get("MLFLOW_TRACKING_URI")
+    if not tracking_uri:
+        raise ValueError("No tracking URI: pass --tracking-uri or set MLFLOW_TRACKING_URI")
+    client = _client(tracking_uri)
+    replayed = failed = 0
+    for run_dir in spooled_runs(spool_dir):
+        try:
+            run_id = replay_run(run_dir, client)
+            print(f"✅ {os.path.basename(run_dir)} → run {run_id}")
+            replayed += 1
+        except Exception as error:
+            print(f"❌ {os.path.basename(run_dir)}: {type(error).__name__}: {error}")
+            failed += 1
+    return replayed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m voyage_common.tracking", description="Spooled tracking runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("status", "List spooled runs"), ("replay", "Send spooled runs to the tracking server")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument("--spool-dir", default=None)
+        if name == "replay":
+            command.add_argument("--tracking-uri", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        for run_dir in spooled_runs(args.spool_dir):
+            with open(os.path.join(run_dir, "run.json")) as f:
+                meta = json.load(f)
+            print(f"{os.path.basename(run_dir)}  {meta['experiment']}/{meta['run_name']}  ({meta.get('reason')})")
+        return 0
+    _, failed = replay(args.spool_dir, args.tracking_uri)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())